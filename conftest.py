@@ -0,0 +1,35 @@
+import os
+import shutil
+
+import pytest
+
+# Semua test GUI berjalan tanpa layar
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    from PyQt5 import QtWidgets
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    yield app
+
+
+@pytest.fixture
+def db_copy(tmp_path, monkeypatch, qapp):
+    # Test bekerja di salinan db_apotek.db supaya data asli tidak berubah
+    shutil.copy(os.path.join(REPO, "db_apotek.db"), tmp_path)
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    import main
+    main.ConnectionPool.close_all()
+
+
+def settle():
+    # Tunggu query async selesai dan proses event (termasuk deleteLater)
+    from PyQt5 import QtCore, QtWidgets
+    for _ in range(3):
+        QtCore.QThreadPool.globalInstance().waitForDone()
+        QtWidgets.QApplication.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+        QtWidgets.QApplication.processEvents()
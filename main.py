@@ -1,35 +1,646 @@
+import time
+STARTUP_T0 = time.perf_counter()
+
+import os
 import sys
+import math
+import heapq
+import queue
 import sqlite3
+import re
 import datetime
+import threading
+import contextlib
+import collections
+import importlib
 from PyQt5 import QtWidgets, QtCore, QtGui
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-import matplotlib.pyplot as plt
-from reportlab.pdfgen import canvas
 
 # --- IMPORT FILE UI ---
-# Pastikan file-file ini ada di folder yang sama
-try:
-    from main_window import Ui_MainWindow as Ui_Dashboard
-    from stok import Ui_MainWindow as Ui_Stok
-    from penjualan import Ui_MainWindow as Ui_Penjualan
-    from data_pembeli import Ui_MainWindow as Ui_Pembeli
-    from supplier import Ui_MainWindow as Ui_Supplier
-    from pembelian import Ui_MainWindow as Ui_Pembelian
-except ImportError as e:
-    print(f"ERROR CRITICAL: File UI tidak ditemukan ({e}).")
-    sys.exit(1)
+# Pastikan file-file ini ada di folder yang sama. Modul UI baru di-import saat
+# halamannya pertama kali dibuka, supaya startup hanya memuat dashboard.
+def load_ui(module_name):
+    try:
+        return importlib.import_module(module_name).Ui_MainWindow
+    except ImportError as e:
+        print(f"ERROR CRITICAL: File UI tidak ditemukan ({e}).")
+        sys.exit(1)
+
+# --- CONNECTION POOL ---
+class ConnectionPool:
+    """
+    Menyimpan koneksi SQLite yang tetap terbuka, satu koneksi per thread.
+    PRAGMA hanya dijalankan sekali saat koneksi dibuka, dan koneksi yang
+    dilepas thread dikembalikan ke pool kecil agar bisa dipakai ulang.
+    """
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA mmap_size=268435456",   # 256 MB
+        "PRAGMA cache_size=-16000",     # ~16 MB page cache
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA busy_timeout=5000",
+    )
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, db_name, max_idle=4):
+        self.db_name = db_name
+        self._idle = queue.LifoQueue(maxsize=max_idle)
+        self._local = threading.local()
+        self._all = []
+        self._lock = threading.Lock()
+        self.migrated = False
+        self.migrate_lock = threading.Lock()
+        self.catalog = None     # MedicineCatalog, dibuat saat pertama dipakai
+        self.popularity_day = None
+
+    @classmethod
+    def for_db(cls, db_name):
+        # Satu pool untuk setiap file database
+        key = os.path.abspath(db_name)
+        with cls._pools_lock:
+            pool = cls._pools.get(key)
+            if pool is None:
+                pool = cls._pools[key] = cls(db_name)
+            return pool
+
+    @classmethod
+    def close_all(cls):
+        with cls._pools_lock:
+            pools = list(cls._pools.values())
+            cls._pools.clear()
+        for pool in pools:
+            pool.close()
+
+    def _open(self):
+        # check_same_thread=False karena koneksi bisa berpindah thread lewat pool,
+        # tapi selalu hanya dipegang satu thread pada satu waktu.
+        conn = sqlite3.connect(self.db_name, check_same_thread=False)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            self._all.append(conn)
+        return conn
+
+    def acquire(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._open()
+            self._local.conn = conn
+        return conn
+
+    def release(self):
+        # Dipanggil oleh thread pekerja sebelum selesai
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            self._discard(conn)
+
+    def _discard(self, conn):
+        with self._lock:
+            if conn in self._all:
+                self._all.remove(conn)
+        conn.close()
+
+    def close(self):
+        if self.catalog is not None:
+            self.catalog.stop()
+            self.catalog = None
+        with self._lock:
+            conns, self._all = self._all, []
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+# --- MIGRASI SKEMA ---
+# Setiap langkah menerima cursor di dalam transaksi. Urutan di list = nomor versi
+# (PRAGMA user_version), jadi langkah baru selalu ditambahkan di paling bawah.
+def _m001_index_dasar(cur):
+    for stmt in (
+        "CREATE INDEX IF NOT EXISTS idx_sale_details_sale ON sale_details(sale_id)",
+        "CREATE INDEX IF NOT EXISTS idx_sale_details_medicine ON sale_details(medicine_id)",
+        "CREATE INDEX IF NOT EXISTS idx_purchases_supplier ON purchases(supplier_id)",
+        "CREATE INDEX IF NOT EXISTS idx_purchase_details_purchase ON purchase_details(purchase_id)",
+        "CREATE INDEX IF NOT EXISTS idx_sales_tanggal ON sales(tanggal)",
+        "CREATE INDEX IF NOT EXISTS idx_sales_member ON sales(member_id)",
+        "CREATE INDEX IF NOT EXISTS idx_medicines_stok ON medicines(stok)",
+    ):
+        cur.execute(stmt)
+
+def _m002_analyze(cur):
+    cur.execute("ANALYZE")
+
+# Ubah 'DD/MM/YYYY[...]' menjadi 'YYYY-MM-DD[...]', format lain dibiarkan
+_ISO_TANGGAL = ("CASE WHEN {col} LIKE '__/__/____%' "
+                "THEN substr({col},7,4)||'-'||substr({col},4,2)||'-'||substr({col},1,2)||substr({col},11) "
+                "ELSE {col} END")
+# Kunci hari integer YYYYMMDD, bisa diurutkan dan di-index
+_HARI_KEY = "CAST(strftime('%Y%m%d', {col}) AS INTEGER)"
+
+def _m003_sales_hari(cur):
+    iso_new = _ISO_TANGGAL.format(col="NEW.tanggal")
+    cur.execute("ALTER TABLE sales ADD COLUMN hari INTEGER")
+    cur.execute(f"UPDATE sales SET tanggal = {_ISO_TANGGAL.format(col='tanggal')} WHERE tanggal LIKE '__/__/____%'")
+    cur.execute(f"UPDATE sales SET hari = {_HARI_KEY.format(col='tanggal')}")
+    for event in ("INSERT", "UPDATE OF tanggal"):
+        name = "trg_sales_hari_" + event.split()[0].lower()
+        cur.execute(f"""
+            CREATE TRIGGER {name} AFTER {event} ON sales
+            BEGIN
+                UPDATE sales SET tanggal = {iso_new}, hari = {_HARI_KEY.format(col=iso_new)}
+                WHERE id = NEW.id;
+            END""")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_sales_hari ON sales(hari)")
+
+def _rebuild_daily_summary(cur):
+    # Hitung ulang seluruh ringkasan harian dari tabel mentah (untuk backfill)
+    cur.execute("DELETE FROM daily_sales_summary")
+    cur.execute("""
+        INSERT INTO daily_sales_summary (hari, jumlah_transaksi, total, item_terjual)
+        SELECT s.hari, COUNT(*), COALESCE(SUM(s.total_harga), 0), COALESCE(SUM(d.items), 0)
+        FROM sales s
+        LEFT JOIN (SELECT sale_id, SUM(jumlah) AS items FROM sale_details GROUP BY sale_id) d
+               ON d.sale_id = s.id
+        WHERE s.hari IS NOT NULL
+        GROUP BY s.hari""")
+
+def _m004_daily_summary(cur):
+    cur.execute("""
+        CREATE TABLE daily_sales_summary (
+            hari INTEGER PRIMARY KEY,
+            jumlah_transaksi INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            item_terjual INTEGER NOT NULL DEFAULT 0
+        )""")
+    # Upsert memakai INSERT ... SELECT ... WHERE (WHERE wajib ada sebelum ON CONFLICT)
+    tambah = """
+        INSERT INTO daily_sales_summary (hari, jumlah_transaksi, total, item_terjual)
+        SELECT {hari}, {trx}, {total}, {items} WHERE {hari} IS NOT NULL
+        ON CONFLICT(hari) DO UPDATE SET
+            jumlah_transaksi = jumlah_transaksi + excluded.jumlah_transaksi,
+            total = total + excluded.total,
+            item_terjual = item_terjual + excluded.item_terjual;"""
+    kurang = """
+        UPDATE daily_sales_summary SET
+            jumlah_transaksi = jumlah_transaksi - {trx},
+            total = total - {total},
+            item_terjual = item_terjual - {items}
+        WHERE hari = {hari};
+        DELETE FROM daily_sales_summary WHERE hari = {hari} AND jumlah_transaksi <= 0;"""
+    old_sale = dict(hari="OLD.hari", trx=1, total="COALESCE(OLD.total_harga, 0)",
+                    items="(SELECT COALESCE(SUM(jumlah), 0) FROM sale_details WHERE sale_id = OLD.id)")
+    new_sale = dict(hari="NEW.hari", trx=1, total="COALESCE(NEW.total_harga, 0)",
+                    items="(SELECT COALESCE(SUM(jumlah), 0) FROM sale_details WHERE sale_id = NEW.id)")
+    old_line = dict(hari="(SELECT hari FROM sales WHERE id = OLD.sale_id)", trx=0, total=0,
+                    items="COALESCE(OLD.jumlah, 0)")
+    new_line = dict(hari="(SELECT hari FROM sales WHERE id = NEW.sale_id)", trx=0, total=0,
+                    items="COALESCE(NEW.jumlah, 0)")
+    # sales.hari bisa diisi belakangan oleh trigger trg_sales_hari_*, jadi perpindahan
+    # hari (termasuk NULL -> hari) ditangani trigger UPDATE.
+    triggers = {
+        "trg_summary_sales_insert": ("AFTER INSERT ON sales", tambah.format(**new_sale)),
+        "trg_summary_sales_update": ("AFTER UPDATE OF hari, total_harga ON sales",
+                                     kurang.format(**old_sale) + tambah.format(**new_sale)),
+        "trg_summary_sales_delete": ("AFTER DELETE ON sales", kurang.format(**old_sale)),
+        "trg_summary_details_insert": ("AFTER INSERT ON sale_details", tambah.format(**new_line)),
+        "trg_summary_details_delete": ("AFTER DELETE ON sale_details", kurang.format(**old_line)),
+    }
+    for name, (event, body) in triggers.items():
+        cur.execute(f"CREATE TRIGGER {name} {event} BEGIN {body} END")
+    _rebuild_daily_summary(cur)
+
+def _m005_stock_movements(cur):
+    # Buku besar stok: hanya boleh ditambah. medicines.stok menjadi saldo cache
+    # yang diperbarui trigger setiap ada mutasi baru.
+    cur.execute("""
+        CREATE TABLE stock_movements (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            medicine_id INTEGER NOT NULL,
+            jenis TEXT NOT NULL CHECK (jenis IN ('sale', 'purchase', 'adjustment', 'return')),
+            jumlah INTEGER NOT NULL,
+            ref_id INTEGER,
+            waktu TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+            FOREIGN KEY (medicine_id) REFERENCES medicines (id)
+        )""")
+    cur.execute("CREATE INDEX idx_stock_movements_medicine ON stock_movements(medicine_id, waktu, jumlah)")
+    # Saldo awal = stok yang ada sekarang
+    cur.execute("""
+        INSERT INTO stock_movements (medicine_id, jenis, jumlah)
+        SELECT id, 'adjustment', COALESCE(stok, 0) FROM medicines WHERE COALESCE(stok, 0) != 0""")
+    cur.execute("""
+        CREATE TRIGGER trg_stock_movements_saldo AFTER INSERT ON stock_movements
+        BEGIN
+            UPDATE medicines SET stok = COALESCE(stok, 0) + NEW.jumlah WHERE id = NEW.medicine_id;
+        END""")
+    for event in ("UPDATE", "DELETE"):
+        cur.execute(f"""
+            CREATE TRIGGER trg_stock_movements_no_{event.lower()} BEFORE {event} ON stock_movements
+            BEGIN
+                SELECT RAISE(ABORT, 'stock_movements hanya boleh ditambah');
+            END""")
+
+def _m006_index_sort_stok(cur):
+    # Index untuk sort/filter tabel stok; ekspresi harus sama persis dengan SORT_STOK
+    for stmt in (
+        "CREATE INDEX IF NOT EXISTS idx_medicines_sort_nama ON medicines(nama_obat, id)",
+        "CREATE INDEX IF NOT EXISTS idx_medicines_sort_kategori ON medicines(COALESCE(kategori, ''), id)",
+        "CREATE INDEX IF NOT EXISTS idx_medicines_sort_satuan ON medicines(COALESCE(satuan, ''), id)",
+        "CREATE INDEX IF NOT EXISTS idx_medicines_sort_stok ON medicines(COALESCE(stok, 0), id)",
+        "CREATE INDEX IF NOT EXISTS idx_medicines_sort_status ON medicines(COALESCE(status, ''), id)",
+        "CREATE INDEX IF NOT EXISTS idx_medicines_kategori_stok ON medicines(kategori, COALESCE(stok, 0), id)",
+        "CREATE INDEX IF NOT EXISTS idx_medicines_status_stok ON medicines(status, COALESCE(stok, 0), id)",
+        "ANALYZE medicines",
+    ):
+        cur.execute(stmt)
+
+def _create_fts(cur, table, columns, tokenize="unicode61 remove_diacritics 2", prefix="2 3"):
+    """
+    Buat index FTS5 external-content <table>_fts untuk kolom-kolom tabel, lengkap dengan
+    trigger sinkronisasi dan isi awal. Mengembalikan False jika SQLite tidak punya FTS5
+    (pencarian lalu jatuh ke LIKE).
+    """
+    fts = f"{table}_fts"
+    cols = ", ".join(columns)
+    try:
+        cur.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='id', "
+                    f"tokenize='{tokenize}', prefix='{prefix}')")
+    except sqlite3.OperationalError as e:
+        print(f"FTS5 tidak tersedia untuk {table} ({e}), pencarian memakai LIKE.")
+        return False
+    new_vals = ", ".join(f"NEW.{c}" for c in columns)
+    old_vals = ", ".join(f"OLD.{c}" for c in columns)
+    hapus = f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', OLD.id, {old_vals});"
+    tambah = f"INSERT INTO {fts}(rowid, {cols}) VALUES (NEW.id, {new_vals});"
+    cur.execute(f"CREATE TRIGGER trg_{fts}_insert AFTER INSERT ON {table} BEGIN {tambah} END")
+    cur.execute(f"CREATE TRIGGER trg_{fts}_delete AFTER DELETE ON {table} BEGIN {hapus} END")
+    cur.execute(f"CREATE TRIGGER trg_{fts}_update AFTER UPDATE OF {cols} ON {table} BEGIN {hapus} {tambah} END")
+    cur.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    return True
+
+def _m007_supplier_fts(cur):
+    _create_fts(cur, "suppliers", ["nama_supplier", "alamat", "telepon", "email"])
+
+# Nomor telepon dinormalisasi ke digit saja dengan awalan 0 ("+62 812-3456" -> "08123456").
+# Ekspresi ini dipakai untuk index dan WHERE, jadi teksnya harus sama persis.
+_TELP_DIGIT = "COALESCE(telepon, '')"
+for _ch in (" ", "-", ".", "(", ")", "+"):
+    _TELP_DIGIT = f"replace({_TELP_DIGIT}, '{_ch}', '')"
+_TELP_NORM = f"(CASE WHEN substr({_TELP_DIGIT}, 1, 2) = '62' THEN '0' || substr({_TELP_DIGIT}, 3) ELSE {_TELP_DIGIT} END)"
+
+def _m008_member_search(cur):
+    # Cari member: nama lewat FTS5 (prefix), telepon lewat index nomor ternormalisasi
+    _create_fts(cur, "members", ["nama_member"])
+    cur.execute(f"CREATE INDEX IF NOT EXISTS idx_members_telepon_norm ON members({_TELP_NORM}, id)")
+    cur.execute("ANALYZE members")
+
+def _rebuild_popularity(cur, sejak):
+    # Jumlah terjual per obat sejak hari (YYYYMMDD) tertentu, untuk urutan hasil pencarian kasir
+    cur.execute("DELETE FROM medicine_popularity")
+    cur.execute("""
+        INSERT INTO medicine_popularity (medicine_id, terjual)
+        SELECT d.medicine_id, SUM(d.jumlah) FROM sales s JOIN sale_details d ON d.sale_id = s.id
+        WHERE s.hari >= ? GROUP BY d.medicine_id HAVING SUM(d.jumlah) > 0""", (sejak,))
+
+def _m009_medicine_search(cur):
+    # Pencarian obat kasir: FTS5 atas nama & kategori, diurutkan menurut penjualan terakhir
+    _create_fts(cur, "medicines", ["nama_obat", "kategori"], prefix="1 2 3")
+    cur.execute("""
+        CREATE TABLE medicine_popularity (
+            medicine_id INTEGER PRIMARY KEY,
+            terjual INTEGER NOT NULL DEFAULT 0
+        )""")
+    cur.execute("CREATE INDEX idx_medicine_popularity_terjual ON medicine_popularity(terjual DESC, medicine_id)")
+    cur.execute("""
+        CREATE TRIGGER trg_popularity_details_insert AFTER INSERT ON sale_details BEGIN
+            INSERT INTO medicine_popularity (medicine_id, terjual)
+            SELECT NEW.medicine_id, COALESCE(NEW.jumlah, 0) WHERE NEW.medicine_id IS NOT NULL
+            ON CONFLICT(medicine_id) DO UPDATE SET terjual = terjual + excluded.terjual;
+        END""")
+    cur.execute("""
+        CREATE TRIGGER trg_popularity_details_delete AFTER DELETE ON sale_details BEGIN
+            UPDATE medicine_popularity SET terjual = terjual - COALESCE(OLD.jumlah, 0)
+            WHERE medicine_id = OLD.medicine_id;
+            DELETE FROM medicine_popularity WHERE medicine_id = OLD.medicine_id AND terjual <= 0;
+        END""")
+    _rebuild_popularity(cur, hari_key(datetime.date.today() - datetime.timedelta(days=Database.POPULARITY_DAYS)))
+
+def _m010_barcodes(cur):
+    # Barcode/GTIN utama per obat (unik), ditambah barcode lain (kemasan berbeda, GTIN lama)
+    # di tabel samping. Satu barcode hanya boleh menunjuk satu obat di kedua tempat.
+    cur.execute("ALTER TABLE medicines ADD COLUMN barcode TEXT")
+    cur.execute("CREATE UNIQUE INDEX idx_medicines_barcode ON medicines(barcode)")
+    cur.execute("""
+        CREATE TABLE medicine_barcodes (
+            barcode TEXT PRIMARY KEY,
+            medicine_id INTEGER NOT NULL,
+            FOREIGN KEY (medicine_id) REFERENCES medicines (id)
+        ) WITHOUT ROWID""")
+    cur.execute("CREATE INDEX idx_medicine_barcodes_medicine ON medicine_barcodes(medicine_id)")
+    bentrok = "SELECT RAISE(ABORT, 'barcode sudah dipakai obat lain') WHERE EXISTS ({cek});"
+    triggers = {
+        "trg_barcode_utama_insert": ("BEFORE INSERT ON medicines WHEN NEW.barcode IS NOT NULL",
+                                     bentrok.format(cek="SELECT 1 FROM medicine_barcodes WHERE barcode = NEW.barcode "
+                                                        "AND medicine_id IS NOT NEW.id")),
+        "trg_barcode_utama_update": ("BEFORE UPDATE OF barcode ON medicines WHEN NEW.barcode IS NOT NULL",
+                                     bentrok.format(cek="SELECT 1 FROM medicine_barcodes WHERE barcode = NEW.barcode "
+                                                        "AND medicine_id != NEW.id")),
+        "trg_barcode_lain_insert": ("BEFORE INSERT ON medicine_barcodes",
+                                    bentrok.format(cek="SELECT 1 FROM medicines WHERE barcode = NEW.barcode "
+                                                       "AND id != NEW.medicine_id")),
+        "trg_barcode_lain_update": ("BEFORE UPDATE ON medicine_barcodes",
+                                    bentrok.format(cek="SELECT 1 FROM medicines WHERE barcode = NEW.barcode "
+                                                       "AND id != NEW.medicine_id")),
+        "trg_barcode_obat_delete": ("AFTER DELETE ON medicines",
+                                    "DELETE FROM medicine_barcodes WHERE medicine_id = OLD.id;"),
+    }
+    for name, (event, body) in triggers.items():
+        cur.execute(f"CREATE TRIGGER {name} {event} BEGIN {body} END")
+
+def _m011_medicine_changes(cur):
+    # Log perubahan obat bersama untuk semua koneksi/terminal: setiap tulisan ke medicines
+    # atau medicine_barcodes mencatat id obatnya, MedicineCatalog membaca dari seq terakhir.
+    cur.execute("""
+        CREATE TABLE medicine_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            medicine_id INTEGER NOT NULL
+        )""")
+    catat = "INSERT INTO medicine_changes (medicine_id) VALUES ({});"
+    triggers = {
+        "trg_changes_medicines_insert": ("AFTER INSERT ON medicines", catat.format("NEW.id")),
+        "trg_changes_medicines_update": ("AFTER UPDATE ON medicines", catat.format("NEW.id")),
+        "trg_changes_medicines_id": ("AFTER UPDATE OF id ON medicines WHEN OLD.id != NEW.id", catat.format("OLD.id")),
+        "trg_changes_medicines_delete": ("AFTER DELETE ON medicines", catat.format("OLD.id")),
+        "trg_changes_barcodes_insert": ("AFTER INSERT ON medicine_barcodes", catat.format("NEW.medicine_id")),
+        "trg_changes_barcodes_update": ("AFTER UPDATE ON medicine_barcodes",
+                                        catat.format("OLD.medicine_id") + catat.format("NEW.medicine_id")),
+        "trg_changes_barcodes_delete": ("AFTER DELETE ON medicine_barcodes", catat.format("OLD.medicine_id")),
+    }
+    for name, (event, body) in triggers.items():
+        cur.execute(f"CREATE TRIGGER {name} {event} BEGIN {body} END")
+
+MIGRATIONS = [
+    _m001_index_dasar,
+    _m002_analyze,
+    _m003_sales_hari,
+    _m004_daily_summary,
+    _m005_stock_movements,
+    _m006_index_sort_stok,
+    _m007_supplier_fts,
+    _m008_member_search,
+    _m009_medicine_search,
+    _m010_barcodes,
+    _m011_medicine_changes,
+]
+
+def fts_query(teks):
+    # "budi 0812" -> '"budi"* "0812"*' (semua kata harus cocok, masing-masing sebagai prefix)
+    return " ".join(f'"{tok}"*' for tok in re.findall(r"\w+", teks))
+
+def normalisasi_telepon(teks):
+    # Sama dengan _TELP_NORM, untuk input pencarian. Awalan 62 baru diganti 0 kalau sudah
+    # ada digit sesudahnya; "62" saja tetap dicari apa adanya (bukan semua nomor berawalan 0).
+    digit = re.sub(r"\D", "", teks)
+    return "0" + digit[2:] if digit.startswith("62") and len(digit) > 2 else digit
+
+def hari_key(tgl):
+    # date/datetime -> integer YYYYMMDD (sama dengan kolom sales.hari)
+    return tgl.year * 10000 + tgl.month * 100 + tgl.day
+
+# --- INSTRUMENTASI QUERY ---
+class QueryStats:
+    """
+    Statistik per statement (latensi, jumlah baris, pemanggil). Statement yang lebih
+    lambat dari slow_ms dicatat beserta EXPLAIN QUERY PLAN ke slow-query log yang
+    berotasi. Nonaktif kecuali APOTEK_PROFILE_SQL=1 atau --profile-sql.
+    """
+    def __init__(self, slow_ms=100.0, log_file="slow_query.log"):
+        self.enabled = False
+        self.slow_ms = slow_ms
+        self.log_file = log_file
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._log = None
+
+    def enable(self, slow_ms=None):
+        if slow_ms is not None:
+            self.slow_ms = slow_ms
+        if self._log is None:
+            # logging hanya dibutuhkan saat profiling aktif, jadi tidak di-import saat startup
+            import logging.handlers
+            self._log = logging.getLogger("apotek.slow_query")
+            self._log.setLevel(logging.INFO)
+            self._log.propagate = False
+            handler = logging.handlers.RotatingFileHandler(self.log_file, maxBytes=1_000_000, backupCount=3,
+                                                           encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self._log.addHandler(handler)
+        self.enabled = True
+
+    @staticmethod
+    def _caller():
+        # Frame pertama di luar lapisan database, mis. "DashboardWindow.load_statistics"
+        frame = sys._getframe(1)
+        while frame:
+            obj = frame.f_locals.get("self")
+            internal = isinstance(obj, (Database, TimedCursor, QueryStats, ConnectionPool))
+            if not internal and not frame.f_code.co_filename.endswith("contextlib.py"):
+                name = frame.f_code.co_name
+                return f"{type(obj).__name__}.{name}" if obj is not None else name
+            frame = frame.f_back
+        return "?"
+
+    def record(self, conn, query, params, seconds, rows, caller):
+        key = " ".join(query.split())
+        ms = seconds * 1000.0
+        with self._lock:
+            st = self.stats.get(key)
+            if st is None:
+                st = self.stats[key] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0, 'callers': {}}
+            st['count'] += 1
+            st['total_ms'] += ms
+            st['max_ms'] = max(st['max_ms'], ms)
+            st['rows'] += rows
+            st['callers'][caller] = st['callers'].get(caller, 0) + 1
+        if ms >= self.slow_ms:
+            try:
+                plan = conn.execute("EXPLAIN QUERY PLAN " + query, params).fetchall()
+                plan = "; ".join(r[-1] for r in plan) or "-"
+            except sqlite3.Error as e:
+                plan = f"(plan tidak tersedia: {e})"
+            self._log.info("%.1f ms | %d baris | %s | %s | plan: %s", ms, rows, caller, key, plan)
+
+    def top(self, n=10):
+        with self._lock:
+            items = sorted(self.stats.items(), key=lambda kv: kv[1]['total_ms'], reverse=True)
+        return items[:n]
+
+    def summary(self, n=10):
+        lines = []
+        for query, st in self.top(n):
+            caller = max(st['callers'], key=st['callers'].get)
+            lines.append(f"{st['total_ms']:8.1f} ms total | {st['count']}x | max {st['max_ms']:.1f} ms | "
+                         f"{st['rows']} baris | {caller}\n    {query[:120]}")
+        return "\n".join(lines) if lines else "Belum ada query tercatat."
+
+QUERY_STATS = QueryStats(slow_ms=float(os.environ.get("APOTEK_SLOW_MS", "100")))
+if os.environ.get("APOTEK_PROFILE_SQL") == "1":
+    QUERY_STATS.enable()
+
+class TimedCursor:
+    """Pembungkus cursor yang mengukur waktu execute + fetch lalu melapor ke QueryStats."""
+    def __init__(self, cursor, stats):
+        self._cur = cursor
+        self._stats = stats
+        self._pending = None
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+    def _flush(self):
+        if self._pending is None:
+            return
+        query, params, seconds, rows, caller = self._pending
+        self._pending = None
+        if rows == 0 and self._cur.rowcount > 0:
+            rows = self._cur.rowcount
+        self._stats.record(self._cur.connection, query, params, seconds, rows, caller)
+
+    def execute(self, query, params=()):
+        self._flush()
+        t0 = time.perf_counter()
+        self._cur.execute(query, params)
+        self._pending = [query, params, time.perf_counter() - t0, 0, QueryStats._caller()]
+        return self
+
+    def executemany(self, query, rows):
+        self._flush()
+        rows = list(rows)
+        t0 = time.perf_counter()
+        self._cur.executemany(query, rows)
+        self._pending = [query, rows[0] if rows else (), time.perf_counter() - t0, 0, QueryStats._caller()]
+        return self
+
+    def fetchall(self):
+        t0 = time.perf_counter()
+        rows = self._cur.fetchall()
+        if self._pending is not None:
+            self._pending[2] += time.perf_counter() - t0
+            self._pending[3] += len(rows)
+        return rows
+
+    def fetchone(self):
+        t0 = time.perf_counter()
+        row = self._cur.fetchone()
+        if self._pending is not None:
+            self._pending[2] += time.perf_counter() - t0
+            self._pending[3] += 1 if row is not None else 0
+        return row
+
+    def close(self):
+        self._flush()
+        self._cur.close()
 
 # --- DATABASE HANDLER ---
 class Database:
+    # Mutasi stok massal, dipakai dengan executemany: baris (medicine_id, jenis, jumlah, ref_id).
+    # Jumlah bertanda: negatif untuk penjualan, positif untuk pembelian/retur.
+    STOCK_MOVEMENT = "INSERT INTO stock_movements (medicine_id, jenis, jumlah, ref_id) VALUES (?,?,?,?)"
+    # Penyesuaian ke stok target: (medicine_id, stok_baru, medicine_id), dilewati jika tidak berubah
+    STOCK_ADJUST = """INSERT INTO stock_movements (medicine_id, jenis, jumlah)
+                      SELECT id, 'adjustment', ? - COALESCE(stok, 0) FROM medicines
+                      WHERE id = ? AND ? - COALESCE(stok, 0) != 0"""
+    # Jendela "penjualan terakhir" untuk urutan pencarian obat (medicine_popularity)
+    POPULARITY_DAYS = 30
+
     def __init__(self, db_name="db_apotek.db"):
         self.db_name = db_name
+        self.pool = ConnectionPool.for_db(db_name)
+        if not self.pool.migrated:
+            self.migrate()
 
     def connect(self):
-        return sqlite3.connect(self.db_name)
+        return self.pool.acquire()
+
+    def cursor(self, conn=None):
+        # Cursor biasa, atau TimedCursor kalau instrumentasi query aktif
+        cursor = (conn or self.connect()).cursor()
+        return TimedCursor(cursor, QUERY_STATS) if QUERY_STATS.enabled else cursor
+
+    def migrate(self):
+        # Jalankan langkah migrasi yang belum pernah diterapkan, satu transaksi per langkah
+        with self.pool.migrate_lock:
+            if self.pool.migrated:
+                return
+            versi = self.connect().execute("PRAGMA user_version").fetchone()[0]
+            for target, step in enumerate(MIGRATIONS, start=1):
+                if target <= versi:
+                    continue
+                try:
+                    with self.transaction() as cur:
+                        step(cur)
+                        cur.execute(f"PRAGMA user_version = {target}")
+                except Exception as e:
+                    print(f"Migrasi Error ({step.__name__}): {e}")
+                    raise
+            self.pool.migrated = True
+
+    def has_table(self, name):
+        return self.fetch_one("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)) is not None
+
+    def refresh_popularity(self):
+        # Trigger hanya menambah; sekali sehari jendelanya digeser dengan hitung ulang
+        hari_ini = hari_key(datetime.date.today())
+        if self.pool.popularity_day == hari_ini:
+            return
+        sejak = hari_key(datetime.date.today() - datetime.timedelta(days=self.POPULARITY_DAYS))
+        try:
+            with self.transaction() as cur:
+                _rebuild_popularity(cur, sejak)
+        except sqlite3.Error as e:
+            print(f"DB Error: {e}")
+            return
+        self.pool.popularity_day = hari_ini
+
+    def search_medicines(self, teks, kandidat=500):
+        """
+        Kandidat pencarian obat kasir: [(id, terjual_30_hari), ...] untuk obat yang cocok.
+        Dibatasi ke kandidat hasil FTS pertama ditambah obat terlaris yang cocok, supaya
+        prefix pendek yang cocok dengan puluhan ribu obat tetap cepat. Peringkat akhir
+        (stok, nama) dihitung MedicineCatalog.search di memori.
+        """
+        match = fts_query(teks)
+        if not match:
+            return []
+        if self.has_table("medicines_fts"):
+            hit = """SELECT id FROM (SELECT rowid AS id FROM medicines_fts WHERE medicines_fts MATCH :q LIMIT :n)
+                     UNION
+                     SELECT f.rowid FROM (SELECT medicine_id FROM medicine_popularity ORDER BY terjual DESC LIMIT :n) t
+                     JOIN medicines_fts f ON f.rowid = t.medicine_id WHERE medicines_fts MATCH :q"""
+            params = {"q": match, "n": kandidat}
+        else:
+            hit = "SELECT id FROM medicines WHERE nama_obat LIKE :q OR kategori LIKE :q LIMIT :n"
+            params = {"q": f"%{teks}%", "n": kandidat}
+        return self.fetch_all(f"SELECT h.id, COALESCE(p.terjual, 0) FROM ({hit}) h "
+                              "LEFT JOIN medicine_popularity p ON p.medicine_id = h.id", params)
+
+    def rebuild_daily_summary(self):
+        with self.transaction() as cur:
+            _rebuild_daily_summary(cur)
 
     def fetch_all(self, query, params=()):
         conn = self.connect()
-        cursor = conn.cursor()
+        cursor = self.cursor(conn)
         try:
             cursor.execute(query, params)
             return cursor.fetchall()
@@ -37,11 +648,11 @@ class Database:
             print(f"DB Error: {e}")
             return []
         finally:
-            conn.close()
+            cursor.close()
 
     def fetch_one(self, query, params=()):
         conn = self.connect()
-        cursor = conn.cursor()
+        cursor = self.cursor(conn)
         try:
             cursor.execute(query, params)
             return cursor.fetchone()
@@ -49,117 +660,970 @@ class Database:
             print(f"DB Error: {e}")
             return None
         finally:
-            conn.close()
+            cursor.close()
 
     def execute_query(self, query, params=()):
         conn = self.connect()
-        cursor = conn.cursor()
+        cursor = self.cursor(conn)
         try:
             cursor.execute(query, params)
             conn.commit()
+            self._after_write()
             return True
         except Exception as e:
             print(f"DB Error: {e}")
+            conn.rollback()
             return False
         finally:
-            conn.close()
+            cursor.close()
+
+    def execute_many(self, query, rows):
+        # Satu prepared statement untuk banyak baris, satu commit
+        conn = self.connect()
+        cursor = self.cursor(conn)
+        try:
+            cursor.executemany(query, rows)
+            conn.commit()
+            self._after_write()
+            return True
+        except Exception as e:
+            print(f"DB Error: {e}")
+            conn.rollback()
+            return False
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def stock_movements(items, jenis, ref_id=None, sign=-1):
+        # Gabungkan jumlah per obat supaya satu id cukup satu baris mutasi
+        total = {}
+        for i in items:
+            total[i['id']] = total.get(i['id'], 0) + i['qty']
+        return [(mid, jenis, sign * qty, ref_id) for mid, qty in total.items()]
+
+    def stock_at(self, medicine_id, waktu):
+        # Saldo stok pada titik waktu tertentu ('YYYY-MM-DD HH:MM:SS')
+        row = self.fetch_one("SELECT COALESCE(SUM(jumlah), 0) FROM stock_movements "
+                             "WHERE medicine_id = ? AND waktu <= ?", (medicine_id, waktu))
+        return row[0] if row else 0
+
+    def reconcile_stock(self):
+        """
+        Hitung ulang saldo semua obat dari buku besar dalam satu GROUP BY.
+        Mengembalikan daftar selisih (id, stok_cache, saldo_ledger) yang diperbaiki.
+        """
+        with self.transaction() as cur:
+            cur.execute("""
+                SELECT m.id, m.stok, COALESCE(b.saldo, 0) FROM medicines m
+                LEFT JOIN (SELECT medicine_id, SUM(jumlah) AS saldo FROM stock_movements
+                           GROUP BY medicine_id) b ON b.medicine_id = m.id
+                WHERE m.stok IS NOT COALESCE(b.saldo, 0)""")
+            selisih = cur.fetchall()
+            cur.executemany("UPDATE medicines SET stok = ? WHERE id = ?", [(r[2], r[0]) for r in selisih])
+        return selisih
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Unit of work: semua statement di dalam blok masuk satu BEGIN IMMEDIATE/COMMIT.
+        Kalau ada error, semua di-rollback dan exception diteruskan ke pemanggil.
+        """
+        conn = self.connect()
+        cursor = self.cursor(conn)
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            yield cursor
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        self._after_write()
+
+    def _after_write(self):
+        # Katalog obat membaca log perubahan yang baru ditulis (hanya di GUI thread;
+        # tulisan dari thread lain terdeteksi lewat PRAGMA data_version)
+        catalog = self.pool.catalog
+        if catalog is not None and threading.current_thread() is threading.main_thread():
+            catalog.sync()
+
+# --- ASYNC QUERY (QThreadPool) ---
+class QueryTask(QtCore.QRunnable):
+    """Menjalankan fungsi database di thread pekerja, hasil dikirim lewat signal ke GUI thread."""
+    class Signals(QtCore.QObject):
+        finished = QtCore.pyqtSignal(object)
+        failed = QtCore.pyqtSignal(str)
+        done = QtCore.pyqtSignal()
+
+    def __init__(self, fn, pool):
+        super().__init__()
+        self.fn = fn
+        self.pool = pool
+        self.cancelled = False
+        # Objek C++ tidak dihapus thread pool begitu run() selesai; masa hidupnya dipegang
+        # QueryExecutor.running sampai signal done, supaya tryTake tidak kena objek yang sudah dihapus
+        self.setAutoDelete(False)
+        # Dibuat di GUI thread, jadi emit dari thread pekerja otomatis di-queue ke GUI thread
+        self.signals = QueryTask.Signals()
+
+    def run(self):
+        try:
+            self._run()
+        finally:
+            self.signals.done.emit()
+
+    def _run(self):
+        if self.cancelled:
+            return
+        try:
+            result = self.fn()
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.failed.emit(str(e))
+            return
+        finally:
+            # Koneksi thread pekerja dikembalikan ke pool
+            self.pool.release()
+        if not self.cancelled:
+            self.signals.finished.emit(result)
+
+class QueryExecutor(QtCore.QObject):
+    """
+    Antrian query per halaman. Setiap task punya key; submit dengan key yang sama
+    membatalkan task lama (hasil basi tidak pernah sampai ke UI).
+    """
+    # Semua task yang sudah di-start dan belum selesai, lintas executor: task tetap hidup
+    # walaupun halaman (dan executor-nya) sudah dibuang sebelum thread pekerja selesai
+    running = set()
+
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.thread_pool = QtCore.QThreadPool.globalInstance()
+        self.tasks = {}
+
+    def submit(self, key, fn, on_done, on_error=None):
+        self.cancel(key)
+        task = QueryTask(fn, self.db.pool)
+        task.signals.finished.connect(lambda result: self._done(key, task, on_done, result))
+        task.signals.failed.connect(lambda msg: self._done(key, task, on_error or self._report, msg))
+        task.signals.done.connect(lambda: QueryExecutor.running.discard(task))
+        self.tasks[key] = task
+        QueryExecutor.running.add(task)
+        self.thread_pool.start(task)
+        return task
+
+    def _done(self, key, task, callback, value):
+        if task.cancelled:
+            return
+        if self.tasks.get(key) is task:
+            del self.tasks[key]
+        callback(value)
+
+    @staticmethod
+    def _report(msg):
+        print(f"DB Error: {msg}")
+
+    def cancel(self, key):
+        task = self.tasks.pop(key, None)
+        if task is not None:
+            task.cancelled = True
+            if self.thread_pool.tryTake(task):
+                # Belum sempat jalan, jadi tidak akan mengirim done
+                QueryExecutor.running.discard(task)
+
+    def cancel_all(self):
+        for key in list(self.tasks):
+            self.cancel(key)
+
+# --- MODEL TABEL (VIRTUAL) ---
+class SqlPageModel(QtCore.QAbstractTableModel):
+    """
+    Model tabel yang mengambil data per halaman dari SQL lewat canFetchMore/fetchMore.
+    Sort (klik header) dan filter dikirim ke SQL sebagai ORDER BY/WHERE, dan halaman
+    diambil dengan keyset pagination (lanjut dari (kunci_sort, id) terakhir) sehingga
+    scroll sedalam apa pun tetap O(halaman). Baris disimpan sebagai tuple, dan hanya
+    max_pages halaman terakhir dipakai yang ditahan di memori; halaman yang sudah
+    dibuang diambil ulang dari kunci awalnya saat dibutuhkan lagi.
+    Kolom pertama hasil SELECT selalu id (tidak ditampilkan).
+    """
+    def __init__(self, db, table, columns, headers, sort_exprs=None, page_size=200, max_pages=20, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.table = table
+        self.columns = list(columns)
+        self.headers = list(headers)
+        # Ekspresi ORDER BY per kolom; harus sama dengan ekspresi index-nya
+        self.sort_exprs = list(sort_exprs or columns)
+        self.sort_column = None     # None = urut id
+        self.sort_desc = False
+        self.filters = {}           # kolom -> nilai (WHERE kolom = ?)
+        self.search = None          # (kondisi WHERE, params) dari kotak pencarian
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self._reset_state()
+
+    def _reset_state(self):
+        self._rows = 0
+        self._pages = collections.OrderedDict()   # no_halaman -> [tuple, ...] (LRU)
+        self._after = [None]                      # kunci awal tiap halaman
+        self._done = False
+
+    def _fetch(self, after):
+        where, params = [], []
+        for col, value in self.filters.items():
+            where.append(f"{col} = ?")
+            params.append(value)
+        if self.search:
+            where.append(f"({self.search[0]})")
+            params.extend(self.search[1])
+        arah, op = ("DESC", "<") if self.sort_desc else ("ASC", ">")
+        select = f"id, {', '.join(self.columns)}"
+        if self.sort_column is None:
+            order = f"id {arah}"
+            if after is not None:
+                where.append(f"id {op} ?")
+                params.extend(after)
+        else:
+            expr = self.sort_exprs[self.sort_column]
+            select += f", {expr}"   # kunci sort ikut diambil untuk keyset halaman berikutnya
+            order = f"{expr} {arah}, id {arah}"
+            if after is not None:
+                # Bentuk ini (bukan row value) supaya SQLite memakai index ekspresi sebagai range
+                where.append(f"{expr} {op}= ? AND ({expr} {op} ? OR id {op} ?)")
+                params.extend((after[0], after[0], after[1]))
+        sql = f"SELECT {select} FROM {self.table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order} LIMIT ?"
+        return self.db.fetch_all(sql, tuple(params) + (self.page_size,))
+
+    def _key(self, row):
+        return (row[0],) if self.sort_column is None else (row[-1], row[0])
+
+    def _store(self, page_no, rows):
+        self._pages[page_no] = rows
+        self._pages.move_to_end(page_no)
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+
+    def row_data(self, row):
+        page_no, offset = divmod(row, self.page_size)
+        rows = self._pages.get(page_no)
+        if rows is None:
+            rows = self._fetch(self._after[page_no])
+            self._store(page_no, rows)
+        else:
+            self._pages.move_to_end(page_no)
+        return rows[offset] if offset < len(rows) else None
+
+    def row_id(self, row):
+        data = self.row_data(row)
+        return data[0] if data else None
+
+    def reload(self):
+        self.beginResetModel()
+        self._reset_state()
+        self.endResetModel()
+        self.fetchMore()
+
+    def set_filter(self, column, value):
+        # value None/"" = tanpa filter
+        if value in (None, ""):
+            self.filters.pop(column, None)
+        else:
+            self.filters[column] = value
+        self.reload()
+
+    def set_search(self, condition=None, params=(), sort_column=None):
+        # condition None = tampilkan semua; sort_column memilih urutan yang cocok dengan index pencarian
+        self.search = (condition, tuple(params)) if condition else None
+        self.sort_column = sort_column
+        self.sort_desc = False
+        self.reload()
+
+    # --- Qt API ---
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self._rows
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == QtCore.Qt.DisplayRole:
+            row = self.row_data(index.row())
+            if row is None:
+                return None
+            value = row[index.column() + 1]
+            return "" if value is None else str(value)
+        if role == QtCore.Qt.UserRole:
+            return self.row_id(index.row())
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        return not parent.isValid() and not self._done
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        if parent.isValid() or self._done:
+            return
+        page_no = len(self._after) - 1
+        rows = self._fetch(self._after[page_no])
+        if len(rows) < self.page_size:
+            self._done = True
+        if not rows:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), self._rows, self._rows + len(rows) - 1)
+        self._store(page_no, rows)
+        self._after.append(self._key(rows[-1]))
+        self._rows += len(rows)
+        self.endInsertRows()
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        # Dipanggil QTableView saat header diklik
+        self.sort_column = column if 0 <= column < len(self.columns) else None
+        self.sort_desc = order == QtCore.Qt.DescendingOrder
+        self.reload()
+
+def table_view_from(widget, model):
+    # Ganti QTableWidget hasil designer dengan QTableView di posisi & gaya yang sama
+    view = QtWidgets.QTableView(widget.parentWidget())
+    view.setGeometry(widget.geometry())
+    view.setStyleSheet(widget.styleSheet().replace("QTableWidget", "QTableView"))
+    view.setShowGrid(widget.showGrid())
+    view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+    view.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+    view.setModel(model)
+    # View baru dibuat paling akhir sehingga berada di atas saudaranya; taruh di lapisan tabel
+    # lama supaya tombol designer yang menumpuk di atas tabel (Edit/Hapus di Stok) tetap bisa diklik
+    view.stackUnder(widget)
+    widget.hide()
+    widget.deleteLater()
+    view.show()
+    return view
+
+# --- KATALOG OBAT (CACHE) ---
+class CatalogItem:
+    # Satu obat di katalog; __slots__ (tanpa __dict__) supaya ratusan ribu obat tetap ringan di memori
+    __slots__ = ("id", "nama", "harga", "stok", "barcodes")
+
+    def __init__(self, id, nama, harga, stok):
+        self.id = id
+        self.nama = nama
+        self.harga = harga or 0
+        self.stok = stok or 0
+        self.barcodes = ()      # barcode utama + barcode lain, diisi MedicineCatalog
+
+    def label(self):
+        return f"{self.nama} - Rp {self.harga:,}"
+
+class MedicineCatalog(QtCore.QObject):
+    """
+    Cache katalog obat untuk seluruh aplikasi: id -> CatalogItem (nama, harga_jual, stok),
+    plus index hash barcode -> id untuk scan di kasir.
+    Dimuat sekali, lalu hanya id yang tercatat di log medicine_changes sejak seq terakhir
+    yang dibaca ulang (dicatat trigger, jadi stok yang diubah trigger ledger dan penjualan
+    di terminal lain ikut terdeteksi). Setelah tulisan sendiri log langsung dibaca; untuk
+    koneksi/proses lain PRAGMA data_version dicek berkala sebagai penanda murah bahwa ada
+    commit baru. Muat ulang penuh hanya saat pertama kali, atau kalau log sudah dipangkas
+    melewati seq terakhir yang dibaca. Hanya dipakai dari GUI thread. Signal changed membawa set id yang berubah,
+    atau None kalau seluruh katalog dimuat ulang.
+    """
+    changed = QtCore.pyqtSignal(object)
+
+    POLL_MS = 2000
+    CHUNK = 500     # batas jumlah parameter per query IN (...)
+    KEEP = 20000    # jumlah entri log terbaru yang disimpan saat log dipangkas
+
+    def __init__(self, db):
+        super().__init__()
+        self.db = db
+        self.items = None
+        self.barcodes = {}
+        self._versi = None
+        self._seq = 0
+        self._timer = QtCore.QTimer(self)
+        self._timer.timeout.connect(self.poll)
+        self._timer.start(self.POLL_MS)
+
+    def stop(self):
+        self._timer.stop()
+
+    @classmethod
+    def for_db(cls, db):
+        # Satu katalog per pool (per file database)
+        if db.pool.catalog is None:
+            db.pool.catalog = cls(db)
+        return db.pool.catalog
+
+    def _load_all(self, conn):
+        # seq dibaca lebih dulu: perubahan yang masuk selama pemuatan akan dibaca ulang nanti
+        seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM medicine_changes").fetchone()[0]
+        lama = self.items, self.barcodes
+        self.items, self.barcodes = {}, {}
+        try:
+            for r in conn.execute("SELECT id, nama_obat, harga_jual, stok, barcode FROM medicines"):
+                self._put(r)
+            for kode, mid in conn.execute("SELECT barcode, medicine_id FROM medicine_barcodes"):
+                self._add_barcode(mid, kode)
+        except sqlite3.Error:
+            self.items, self.barcodes = lama
+            raise
+        self._seq = seq
+
+    def _put(self, row):
+        obat = self.items[row[0]] = CatalogItem(*row[:4])
+        if row[4]:
+            self._add_barcode(obat.id, row[4])
+
+    def _add_barcode(self, mid, kode):
+        obat = self.items.get(mid)
+        if obat is not None:
+            obat.barcodes += (kode,)
+            self.barcodes[kode] = mid
+
+    def _remove(self, mid):
+        obat = self.items.pop(mid, None)
+        for kode in (obat.barcodes if obat else ()):
+            if self.barcodes.get(kode) == mid:
+                del self.barcodes[kode]
+
+    def _changes(self, conn):
+        # (id obat yang berubah sejak seq terakhir, seq terbaru); None kalau sebagian log sudah dipangkas.
+        # self._seq belum dimajukan di sini, baru setelah perubahannya diterapkan
+        rows = conn.execute("SELECT seq, medicine_id FROM medicine_changes WHERE seq > ? ORDER BY seq",
+                            (self._seq,)).fetchall()
+        awal = conn.execute("SELECT MIN(seq) FROM medicine_changes").fetchone()[0]
+        if awal is not None and awal > self._seq + 1:
+            return None
+        return {r[1] for r in rows}, (rows[-1][0] if rows else self._seq)
+
+    def _apply(self, conn, ids):
+        # Semua baris dibaca dulu, katalog baru diubah kalau tidak ada query yang gagal
+        daftar = list(ids)
+        rows, kode = [], []
+        for i in range(0, len(daftar), self.CHUNK):
+            bagian = daftar[i:i + self.CHUNK]
+            tanda = ", ".join("?" * len(bagian))
+            rows += conn.execute(f"SELECT id, nama_obat, harga_jual, stok, barcode FROM medicines "
+                                 f"WHERE id IN ({tanda})", bagian).fetchall()
+            kode += conn.execute(f"SELECT barcode, medicine_id FROM medicine_barcodes "
+                                 f"WHERE medicine_id IN ({tanda})", bagian).fetchall()
+        # Buang dulu semua versi lama (termasuk barcode-nya), lalu masukkan yang masih ada
+        for mid in daftar:
+            self._remove(mid)
+        for r in rows:
+            self._put(r)
+        for k, mid in kode:
+            self._add_barcode(mid, k)
+
+    def _prune(self, conn):
+        # Pangkas log ke KEEP entri terbaru. Best effort: kalau gagal (mis. database locked)
+        # transaksinya dibatalkan supaya koneksi pool tidak tertinggal dalam transaksi terbuka
+        try:
+            awal = conn.execute("SELECT MIN(seq) FROM medicine_changes").fetchone()[0]
+            if awal is not None and self._seq - awal >= 2 * self.KEEP:
+                conn.execute("DELETE FROM medicine_changes WHERE seq <= ?", (self._seq - self.KEEP,))
+                conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"DB Error: {e}")
+
+    def poll(self):
+        # Dipanggil timer: baca log hanya kalau koneksi lain sudah commit sejak cek terakhir
+        conn = self.db.connect()
+        try:
+            versi = conn.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"DB Error: {e}")
+            return
+        if versi != self._versi:
+            self._versi = versi
+            self.sync()
+
+    def sync(self):
+        conn = self.db.connect()
+        if conn.in_transaction:
+            return
+        ids = None
+        try:
+            perubahan = None if self.items is None else self._changes(conn)
+            if perubahan is None:
+                self._load_all(conn)
+            else:
+                ids, seq = perubahan
+                self._apply(conn, ids)
+                self._seq = seq
+        except sqlite3.Error as e:
+            # seq belum maju: poll berikutnya membaca ulang perubahan yang sama
+            self._versi = None
+            print(f"DB Error: {e}")
+            return
+        self._prune(conn)
+        if ids is None:
+            self.changed.emit(None)
+        elif ids:
+            self.changed.emit(ids)
+
+    def all(self):
+        if self.items is None:
+            self.sync()
+        return self.items
+
+    def get(self, medicine_id):
+        return self.all().get(medicine_id)
+
+    def by_barcode(self, kode):
+        # Lookup scan O(1) lewat index hash di memori
+        self.all()
+        mid = self.barcodes.get(kode.strip())
+        return None if mid is None else self.items.get(mid)
+
+    def search(self, teks, limit=20):
+        # Obat berstok yang cocok dengan teks: paling laku 30 hari terakhir dulu, lalu nama
+        items = self.all()
+        hasil = ((terjual, items.get(mid)) for mid, terjual in self.db.search_medicines(teks))
+        return [o.id for _, o in heapq.nsmallest(limit, ((t, o) for t, o in hasil if o is not None and o.stok > 0),
+                                                  key=lambda h: (-h[0], h[1].nama))]
+
+class MedicineSearchModel(QtCore.QAbstractListModel):
+    """
+    Model untuk QCompleter kasir: hanya menyimpan id hasil pencarian teratas;
+    label (nama, harga) dibaca dari katalog saat ditampilkan.
+    """
+    def __init__(self, catalog, limit=20, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self.limit = limit
+        self.ids = []
+
+    def search(self, teks):
+        self.beginResetModel()
+        self.ids = self.catalog.search(teks, self.limit)
+        self.endResetModel()
+
+    def refresh(self):
+        # Nama/harga/stok berubah di katalog: gambar ulang baris yang ada
+        if self.ids:
+            self.dataChanged.emit(self.index(0), self.index(len(self.ids) - 1))
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.ids)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        mid = self.ids[index.row()]
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            obat = self.catalog.get(mid)
+            return obat.label() if obat else ""
+        if role == QtCore.Qt.UserRole:
+            return mid
+        return None
+
+class CartModel(QtCore.QAbstractTableModel):
+    """
+    Keranjang kasir: satu baris per obat (id), jumlah digabung saat obat yang sama
+    ditambah lagi. Total berjalan diperbarui per perubahan (tidak dijumlah ulang),
+    dan dikirim lewat signal total_changed. Kolom Qty bisa diedit; qty 0 = hapus baris.
+    Baris berbentuk dict {'id', 'nama', 'harga', 'qty', 'sub'} dan dipakai langsung oleh bayar.
+    """
+    total_changed = QtCore.pyqtSignal(int)
+
+    HEADERS = ["Obat", "Qty", "Harga", "Subtotal"]
+    QTY = 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.lines = []
+        self._row = {}      # medicine_id -> nomor baris
+        self.total = 0
+
+    def _ubah_total(self, delta):
+        if delta:
+            self.total += delta
+            self.total_changed.emit(self.total)
+
+    def add(self, obat, qty=1):
+        row = self._row.get(obat.id)
+        if row is not None:
+            self.set_qty(row, self.lines[row]['qty'] + qty)
+            return row
+        row = len(self.lines)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self.lines.append({'id': obat.id, 'nama': obat.nama, 'harga': obat.harga, 'qty': qty, 'sub': obat.harga * qty})
+        self._row[obat.id] = row
+        self.endInsertRows()
+        self._ubah_total(obat.harga * qty)
+        return row
+
+    def set_qty(self, row, qty):
+        if qty <= 0:
+            self.remove(row)
+            return
+        line = self.lines[row]
+        sub = line['harga'] * qty
+        delta = sub - line['sub']
+        line['qty'], line['sub'] = qty, sub
+        self.dataChanged.emit(self.index(row, self.QTY), self.index(row, len(self.HEADERS) - 1))
+        self._ubah_total(delta)
+
+    def remove(self, row):
+        if not 0 <= row < len(self.lines):
+            return
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        line = self.lines.pop(row)
+        del self._row[line['id']]
+        for r in range(row, len(self.lines)):
+            self._row[self.lines[r]['id']] = r
+        self.endRemoveRows()
+        self._ubah_total(-line['sub'])
+
+    def clear(self):
+        self.beginResetModel()
+        self.lines, self._row = [], {}
+        self.endResetModel()
+        self._ubah_total(-self.total)
 
-# --- BASE WINDOW (NAVIGATION FIX) ---
+    # --- Qt API ---
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.lines)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        line, col = self.lines[index.row()], index.column()
+        if role == QtCore.Qt.EditRole and col == self.QTY:
+            return line['qty']
+        if role == QtCore.Qt.DisplayRole:
+            return (line['nama'], str(line['qty']), f"Rp {line['harga']:,}", f"Rp {line['sub']:,}")[col]
+        if role == QtCore.Qt.TextAlignmentRole and col > 0:
+            return int(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if role != QtCore.Qt.EditRole or index.column() != self.QTY:
+            return False
+        self.set_qty(index.row(), int(value))
+        return True
+
+    def flags(self, index):
+        flags = super().flags(index)
+        return flags | QtCore.Qt.ItemIsEditable if index.column() == self.QTY else flags
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+class QtyDelegate(QtWidgets.QStyledItemDelegate):
+    # Editor Qty keranjang: spin box 0..9999 (0 menghapus baris)
+    def createEditor(self, parent, option, index):
+        editor = QtWidgets.QSpinBox(parent)
+        editor.setRange(0, 9999)
+        editor.setFrame(False)
+        return editor
+
+# --- BASE PAGE ---
 class BaseWindow(QtWidgets.QMainWindow):
     """
-    Kelas Induk untuk semua halaman.
-    Menggunakan deteksi TEKS pada tombol untuk navigasi.
+    Kelas Induk untuk semua halaman. Halaman ditampilkan di dalam MainShell
+    (bukan jendela sendiri); sidebar dan navigasi diurus oleh shell.
     """
-    def setup_navigation(self):
-        # Cari semua tombol (QPushButton) yang ada di halaman ini
-        all_buttons = self.findChildren(QtWidgets.QPushButton)
-        
-        for btn in all_buttons:
-            # Ambil teks tombol, ubah ke huruf kecil, hilangkan spasi
-            text = btn.text().lower().strip()
-            
-            # --- LOGIKA PENCOCOKAN TEKS ---
-            # Sesuaikan kata kunci ini dengan Tulisan di Tombol Aplikasi Anda
-            
-            if "dashboard" in text or "home" in text:
-                try: btn.clicked.disconnect() 
-                except: pass
-                btn.clicked.connect(self.buka_dashboard)
-                
-            elif "stok" in text or "obat" in text:
-                try: btn.clicked.disconnect() 
-                except: pass
-                btn.clicked.connect(self.buka_stok)
-                
-            elif "penjualan" in text or "kasir" in text:
-                try: btn.clicked.disconnect() 
-                except: pass
-                btn.clicked.connect(self.buka_penjualan)
-                
-            elif "pembeli" in text or "member" in text or "pelanggan" in text:
-                try: btn.clicked.disconnect() 
-                except: pass
-                btn.clicked.connect(self.buka_pembeli)
-                
-            elif "supplier" in text or "pemasok" in text:
-                try: btn.clicked.disconnect() 
-                except: pass
-                btn.clicked.connect(self.buka_supplier)
-                
-            elif "pembelian" in text or "restock" in text or "kulakan" in text:
-                try: btn.clicked.disconnect() 
-                except: pass
-                btn.clicked.connect(self.buka_pembelian)
-                
-            elif "keluar" in text or "exit" in text or "logout" in text:
-                btn.clicked.connect(self.close_app)
+    def show_loading(self, table):
+        # Placeholder selama data dimuat di thread pekerja
+        table.setRowCount(1)
+        table.setItem(0, 0, QtWidgets.QTableWidgetItem("Memuat..."))
+        for c in range(1, table.columnCount()):
+            table.setItem(0, c, QtWidgets.QTableWidgetItem(""))
 
-    # --- FUNGSI PINDAH HALAMAN ---
-    def buka_dashboard(self): self.switch_window(DashboardWindow())
-    def buka_stok(self): self.switch_window(StokWindow())
-    def buka_penjualan(self): self.switch_window(PenjualanWindow())
-    def buka_pembeli(self): self.switch_window(PembeliWindow())
-    def buka_supplier(self): self.switch_window(SupplierWindow())
-    def buka_pembelian(self): self.switch_window(PembelianWindow())
-    def close_app(self): sys.exit()
-
-    def switch_window(self, window_class):
-        self.new_window = window_class
-        self.new_window.show()
-        self.close()
+    def setup_search(self, line_edit, on_search, placeholder, delay=250):
+        # Pencarian saat mengetik: tunggu jeda ketik (debounce) baru query dijalankan
+        line_edit.setPlaceholderText(placeholder)
+        line_edit.clear()
+        timer = QtCore.QTimer(self)
+        timer.setSingleShot(True)
+        timer.setInterval(delay)
+        timer.timeout.connect(on_search)
+        line_edit.textChanged.connect(timer.start)
+        return timer
+
+    def run_async(self, key, fn, on_done):
+        # Query di thread pekerja; on_done dipanggil di GUI thread dengan hasilnya
+        if getattr(self, "queries", None) is None:
+            self.queries = QueryExecutor(self.db, self)
+        return self.queries.submit(key, fn, on_done)
+
+    def cancel_queries(self):
+        # Batalkan query yang masih berjalan supaya hasilnya tidak menyentuh widget yang sudah ditutup
+        if getattr(self, "queries", None) is not None:
+            self.queries.cancel_all()
+
+    def watch_catalog(self, slot):
+        # Ikuti perubahan katalog obat; koneksi signal diputus lagi saat halaman ditutup
+        self.catalog = MedicineCatalog.for_db(self.db)
+        self.catalog.changed.connect(slot)
+        self._catalog_slot = slot
+
+    def dispose(self):
+        # Lepaskan semua yang menahan halaman ini tetap hidup (query, figure, katalog, dll)
+        self.cancel_queries()
+        slot = getattr(self, "_catalog_slot", None)
+        if slot is not None:
+            self._catalog_slot = None
+            try: self.catalog.changed.disconnect(slot)
+            except TypeError: pass
+
+    def closeEvent(self, event):
+        self.dispose()
+        super().closeEvent(event)
+
+    def refresh(self):
+        # Dipanggil saat halaman yang sudah ada ditampilkan lagi; di-override tiap halaman
+        pass
+
+# --- CHART ---
+def format_angka(value):
+    return format(int(value), ',')
+
+def format_rupiah(value):
+    return f"Rp {format_angka(value)}"
+
+class BarChartWidget(QtWidgets.QWidget):
+    """
+    Grafik bar/garis ringan yang digambar langsung dengan QPainter (tanpa matplotlib).
+    Mendukung formatter nilai, tooltip saat hover, dan animasi saat data berubah.
+    """
+    def __init__(self, title="", kind="bar", formatter=format_angka, parent=None):
+        super().__init__(parent)
+        self.title = title
+        self.kind = kind
+        self.formatter = formatter
+        self.color = QtGui.QColor('#4e73df')
+        self.labels = []
+        self.values = []
+        self._from = []
+        self._shown = []
+        self.setMouseTracking(True)
+        self.setMinimumSize(250, 160)
+        self._anim = QtCore.QVariantAnimation(self)
+        self._anim.setStartValue(0.0)
+        self._anim.setEndValue(1.0)
+        self._anim.setDuration(300)
+        self._anim.setEasingCurve(QtCore.QEasingCurve.OutCubic)
+        self._anim.valueChanged.connect(self._step)
+
+    def set_data(self, labels, values, animate=True):
+        # Animasi dimulai dari tinggi yang sedang tampil untuk label yang sama
+        lama = dict(zip(self.labels, self._shown))
+        self.labels = list(labels)
+        self.values = [float(v or 0) for v in values]
+        self._from = [lama.get(lbl, 0.0) for lbl in self.labels]
+        self._anim.stop()
+        if animate and self.isVisible():
+            self._anim.start()
+        else:
+            self._step(1.0)
+
+    def _step(self, t):
+        self._shown = [a + (b - a) * t for a, b in zip(self._from, self.values)]
+        self.update()
+
+    def _plot_rect(self):
+        # Kolom label sumbu Y selebar label terpanjang (formatter bisa membawa satuan, mis. "Rp ")
+        font = QtGui.QFont(self.font())
+        font.setPointSize(7)
+        kiri = QtGui.QFontMetrics(font).horizontalAdvance(self.formatter(self._vmax())) + 12
+        return QtCore.QRectF(self.rect()).adjusted(max(kiri, 60), 24, -10, -34)
+
+    def _vmax(self):
+        # Skala dibulatkan ke kelipatan 1/2/5 supaya label sumbu Y rapi
+        step = max(self.values + [1.0]) / 4
+        mag = 10 ** math.floor(math.log10(step))
+        for m in (1, 2, 5, 10):
+            if step <= m * mag:
+                return m * mag * 4
+
+    def _slot(self, plot):
+        return plot.width() / max(len(self.labels), 1)
+
+    def paintEvent(self, event):
+        p = QtGui.QPainter(self)
+        p.setRenderHint(QtGui.QPainter.Antialiasing)
+        p.fillRect(self.rect(), QtCore.Qt.white)
+        font = p.font()
+        font.setPointSize(8)
+        p.setFont(font)
+        p.setPen(QtGui.QColor('#333333'))
+        p.drawText(QtCore.QRectF(0, 2, self.width(), 20), QtCore.Qt.AlignCenter, self.title)
+
+        plot = self._plot_rect()
+        vmax = self._vmax()
+        font.setPointSize(7)
+        p.setFont(font)
+
+        # Garis bantu + label sumbu Y
+        for i in range(5):
+            y = plot.bottom() - plot.height() * i / 4
+            p.setPen(QtGui.QPen(QtGui.QColor('#e3e6f0'), 1))
+            p.drawLine(QtCore.QPointF(plot.left(), y), QtCore.QPointF(plot.right(), y))
+            p.setPen(QtGui.QColor('#666666'))
+            p.drawText(QtCore.QRectF(0, y - 8, plot.left() - 6, 16), QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter,
+                       self.formatter(vmax * i / 4))
+
+        if not self.labels:
+            p.drawText(plot, QtCore.Qt.AlignCenter, "No Data")
+            return
+
+        slot = self._slot(plot)
+        points = []
+        for i, (label, value) in enumerate(zip(self.labels, self._shown)):
+            x = plot.left() + slot * i
+            h = plot.height() * value / vmax
+            if self.kind == "line":
+                points.append(QtCore.QPointF(x + slot / 2, plot.bottom() - h))
+            else:
+                p.fillRect(QtCore.QRectF(x + slot * 0.2, plot.bottom() - h, slot * 0.6, h), self.color)
+            p.setPen(QtGui.QColor('#666666'))
+            teks = p.fontMetrics().elidedText(label, QtCore.Qt.ElideRight, int(slot))
+            p.drawText(QtCore.QRectF(x, plot.bottom() + 4, slot, 16), QtCore.Qt.AlignHCenter | QtCore.Qt.AlignTop, teks)
+        if points:
+            p.setPen(QtGui.QPen(self.color, 2))
+            p.drawPolyline(QtGui.QPolygonF(points))
+            p.setBrush(self.color)
+            for pt in points:
+                p.drawEllipse(pt, 3, 3)
+
+    def index_at(self, pos):
+        plot = self._plot_rect()
+        if not self.labels or not plot.contains(QtCore.QPointF(pos)):
+            return None
+        i = int((pos.x() - plot.left()) // self._slot(plot))
+        return i if 0 <= i < len(self.labels) else None
+
+    def mouseMoveEvent(self, event):
+        i = self.index_at(event.pos())
+        if i is None:
+            QtWidgets.QToolTip.hideText()
+        else:
+            QtWidgets.QToolTip.showText(event.globalPos(),
+                                        f"{self.labels[i]}\n{self.formatter(self.values[i])}", self)
+        super().mouseMoveEvent(event)
+
+class MatplotlibChart(QtWidgets.QWidget):
+    """
+    Backend matplotlib opsional (untuk laporan lanjutan). Modulnya baru di-import
+    saat kelas ini dibuat, jadi tidak ikut membebani startup.
+    """
+    def __init__(self, title="", kind="bar", formatter=format_angka, parent=None):
+        super().__init__(parent)
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+        from matplotlib.ticker import FuncFormatter
+
+        self.kind = kind
+        self.fig = Figure(figsize=(5,3), dpi=100)
+        self.ax = self.fig.add_subplot(111)
+        self.ax.set_title(title, fontsize=9)
+        self.ax.yaxis.set_major_formatter(FuncFormatter(lambda x, p: formatter(x)))
+        self.artist = None
+        self.jumlah = 0
+        self.fig.tight_layout()
+        self.canvas = FigureCanvas(self.fig)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.canvas)
+
+    def set_data(self, labels, values, animate=True):
+        # Artist dibuat sekali; refresh hanya mengubah tinggi bar/titik garis dan label.
+        # Dibangun ulang hanya kalau jumlah bar berubah
+        values = [v or 0 for v in values]
+        x = list(range(len(values)))
+        if self.artist is None or self.jumlah != len(values):
+            if self.artist is not None:
+                self.artist.remove()
+            if self.kind == "line":
+                self.artist, = self.ax.plot(x, values, color='#4e73df', marker='o')
+            else:
+                self.artist = self.ax.bar(x, values, color='#4e73df')
+            self.jumlah = len(values)
+            self.ax.set_xticks(x)
+            self.ax.set_xlim(-0.5, len(values) - 0.5)
+        elif self.kind == "line":
+            self.artist.set_data(x, values)
+        else:
+            for bar, v in zip(self.artist, values):
+                bar.set_height(v)
+        self.ax.set_xticklabels(labels, rotation=20, fontsize=7)
+        self.ax.set_ylim(0, max(values + [1]) * 1.1)
+        self.canvas.draw_idle()
+
+def make_chart(title="", kind="bar", formatter=format_angka, parent=None):
+    # APOTEK_CHART_BACKEND=matplotlib memakai matplotlib (jika terpasang), default QPainter
+    if os.environ.get("APOTEK_CHART_BACKEND") == "matplotlib":
+        try:
+            return MatplotlibChart(title, kind, formatter, parent)
+        except ImportError as e:
+            print(f"matplotlib tidak tersedia ({e}), memakai grafik bawaan.")
+    return BarChartWidget(title, kind, formatter, parent)
 
 # --- DASHBOARD ---
 class DashboardWindow(BaseWindow):
     def __init__(self):
         super().__init__()
-        self.ui = Ui_Dashboard()
+        self.ui = load_ui("main_window")()
         self.ui.setupUi(self)
         self.db = Database()
         
-        self.setup_navigation() # AUTO DETECT TOMBOL
+        self.init_chart()
+        self.refresh()
+
+    def refresh(self):
         self.load_statistics()
         self.setup_chart()
 
     def load_statistics(self):
-        # Statistik sederhana
+        # Placeholder dulu, angka diisi setelah query selesai di thread pekerja
+        for lbl in (self.ui.label_16, self.ui.label_17, self.ui.label_18, self.ui.label_19):
+            lbl.setText("...")
+        self.run_async("statistik", self.query_statistics, self.show_statistics)
+
+    def query_statistics(self):
+        cnt_obat = self.db.fetch_one("SELECT COUNT(*) FROM medicines")[0]
+        cnt_sup = self.db.fetch_one("SELECT COUNT(*) FROM suppliers")[0]
+        
+        # Angka penjualan dibaca dari ringkasan harian (dijaga oleh trigger)
+        today = hari_key(datetime.date.today())
+        omzet = self.db.fetch_one("SELECT total FROM daily_sales_summary WHERE hari = ?", (today,))
+        omzet_val = omzet[0] if omzet and omzet[0] else 0
+        
+        awal_bulan = today // 100 * 100
+        cnt_trans = self.db.fetch_one("SELECT COALESCE(SUM(jumlah_transaksi), 0) FROM daily_sales_summary "
+                                      "WHERE hari BETWEEN ? AND ?", (awal_bulan + 1, awal_bulan + 31))[0]
+
+        # Stok Menipis (3 obat stok terendah, lewat idx_medicines_stok). Tidak memakai katalog:
+        # memuatnya dari nol di slot akan memblokir GUI thread
+        low = self.db.fetch_all("SELECT nama_obat, stok FROM medicines WHERE stok < 50 ORDER BY stok ASC LIMIT 3")
+        return cnt_obat, cnt_sup, omzet_val, cnt_trans, low
+
+    def show_statistics(self, stats):
         try:
-            cnt_obat = self.db.fetch_one("SELECT COUNT(*) FROM medicines")[0]
+            cnt_obat, cnt_sup, omzet_val, cnt_trans, low = stats
             self.ui.label_16.setText(str(cnt_obat))
-            
-            cnt_sup = self.db.fetch_one("SELECT COUNT(*) FROM suppliers")[0]
             self.ui.label_17.setText(str(cnt_sup))
-            
-            tgl = datetime.date.today().strftime("%Y-%m-%d")
-            omzet = self.db.fetch_one("SELECT SUM(total_harga) FROM sales WHERE tanggal LIKE ?", (f"{tgl}%",))
-            omzet_val = omzet[0] if omzet and omzet[0] else 0
             self.ui.label_18.setText(f"Rp {omzet_val:,}")
-            
-            cnt_trans = self.db.fetch_one("SELECT COUNT(*) FROM sales")[0]
             self.ui.label_19.setText(str(cnt_trans))
             
-            # Stok Menipis (Ambil 3 obat stok terendah)
-            low = self.db.fetch_all("SELECT nama_obat, stok FROM medicines WHERE stok < 50 ORDER BY stok ASC LIMIT 3")
-            
             # Reset
             self.ui.label_10.setText("-"); self.ui.progressBar.setValue(0); self.ui.label_13.setText("")
             self.ui.label_11.setText("-"); self.ui.progressBar_2.setValue(0); self.ui.label_14.setText("")
@@ -182,41 +1646,13 @@ class DashboardWindow(BaseWindow):
             print(f"Stat Error: {e}")
 
     def setup_chart(self):
-        # Grafik Penjualan 7 Hari (Anti Error Tanggal)
-        query = "SELECT tanggal, total_harga FROM sales WHERE total_harga > 0"
-        rows = self.db.fetch_all(query)
-        data = {}
-        
-        for r in rows:
-            tgl, val = r[0], r[1]
-            if not tgl: continue
-            
-            key = None
-            # Deteksi Format YYYY-MM-DD
-            if len(tgl) >= 10 and tgl[4] == '-' and tgl[7] == '-':
-                key = tgl[:10]
-            # Deteksi Format DD/MM/YYYY
-            elif len(tgl) >= 10 and tgl[2] == '/' and tgl[5] == '/':
-                try:
-                    p = tgl[:10].split('/')
-                    key = f"{p[2]}-{p[1]}-{p[0]}"
-                except: pass
-            
-            if key:
-                data[key] = data.get(key, 0) + val
-                
-        sorted_keys = sorted(data.keys())[-7:]
-        dates = sorted_keys if sorted_keys else ["No Data"]
-        values = [data[k] for k in sorted_keys] if sorted_keys else [0]
-        
-        self.fig, self.ax = plt.subplots(figsize=(5,3), dpi=100)
-        self.ax.bar(dates, values, color='#4e73df')
-        self.ax.set_title("Penjualan 7 Hari Terakhir", fontsize=9)
-        self.ax.tick_params(axis='x', rotation=20, labelsize=7)
-        self.ax.get_yaxis().set_major_formatter(plt.FuncFormatter(lambda x, p: format(int(x), ',')))
-        self.fig.tight_layout()
-        
-        canvas = FigureCanvas(self.fig)
+        # Grafik Penjualan 7 Hari: langsung dari ringkasan harian, O(hari)
+        query = "SELECT hari, total FROM daily_sales_summary WHERE total > 0 ORDER BY hari DESC LIMIT 7"
+        self.run_async("grafik", lambda: self.db.fetch_all(query), self.draw_chart)
+
+    def init_chart(self):
+        # Widget grafik dibuat sekali; refresh hanya mengganti datanya
+        self.chart = make_chart("Penjualan 7 Hari Terakhir", formatter=format_rupiah)
         if not self.ui.frame_10.layout():
             self.ui.frame_10.setLayout(QtWidgets.QVBoxLayout())
         
@@ -225,16 +1661,24 @@ class DashboardWindow(BaseWindow):
             item = self.ui.frame_10.layout().takeAt(0)
             if item.widget(): item.widget().deleteLater()
             
-        self.ui.frame_10.layout().addWidget(canvas)
+        self.ui.frame_10.layout().addWidget(self.chart)
+
+    def draw_chart(self, rows):
+        rows = list(reversed(rows))
+        # Label pendek dd/mm supaya muat di kartu dashboard
+        self.chart.set_data([f"{r[0] % 100:02d}/{r[0] // 100 % 100:02d}" for r in rows], [r[1] for r in rows])
 
 # --- STOK ---
 class StokWindow(BaseWindow):
+    # Ekspresi ORDER BY per kolom tabel stok (sama dengan index _m006_index_sort_stok)
+    SORT_STOK = ["nama_obat", "COALESCE(kategori, '')", "COALESCE(satuan, '')", "COALESCE(stok, 0)",
+                 "COALESCE(status, '')"]
+
     def __init__(self):
         super().__init__()
-        self.ui = Ui_Stok()
+        self.ui = load_ui("stok")()
         self.ui.setupUi(self)
         self.db = Database()
-        self.setup_navigation() # AUTO DETECT TOMBOL
         
         # Mapping Tombol CRUD (Berdasarkan posisi/nama umum di UI Anda)
         try:
@@ -244,19 +1688,58 @@ class StokWindow(BaseWindow):
         except:
             print("Warning: Tombol CRUD Stok tidak ditemukan, cek nama variabel di Qt Designer.")
 
-        self.load_data()
+        # Tabel stok virtual: baris diambil per halaman saat di-scroll, id disimpan di model.
+        # Sort header dan filter dijalankan di SQL (lihat index _m006_index_sort_stok).
+        self.model = SqlPageModel(self.db, "medicines", ["nama_obat", "kategori", "satuan", "stok", "status"],
+                                  ["Nama Obat", "Kategori", "Satuan", "Stock", "Status"],
+                                  sort_exprs=self.SORT_STOK, parent=self)
+        self.table = table_view_from(self.ui.tableWidget, self.model)
+        self.table.horizontalHeader().setSortIndicator(-1, QtCore.Qt.AscendingOrder)   # awal: urut id
+        self.table.setSortingEnabled(True)
+
+        self.cb_kategori = QtWidgets.QComboBox(self.ui.frame_4)
+        self.cb_kategori.setGeometry(QtCore.QRect(300, 62, 170, 28))
+        self.cb_status = QtWidgets.QComboBox(self.ui.frame_4)
+        self.cb_status.setGeometry(QtCore.QRect(480, 62, 180, 28))
+        self.cb_kategori.currentIndexChanged.connect(
+            lambda: self.model.set_filter("kategori", self.cb_kategori.currentData()))
+        self.cb_status.currentIndexChanged.connect(
+            lambda: self.model.set_filter("status", self.cb_status.currentData()))
+        self.load_filters()
+
+        # Tabel dimuat ulang hanya kalau katalog obat berubah (edit, penjualan, terminal lain);
+        # pemuatan pertama dilakukan view sendiri lewat fetchMore
+        self.perlu_muat = False
+        self.watch_catalog(self.on_catalog_changed)
+
+    def refresh(self):
+        if self.perlu_muat:
+            self.load_filters()
+            self.load_data()
+
+    def on_catalog_changed(self, ids):
+        self.perlu_muat = True
+        if self.isVisible():
+            self.refresh()
+
+    def load_filters(self):
+        # Isi pilihan filter dari data (pakai index kategori/status), pilihan lama dipertahankan
+        for cb, col, semua in ((self.cb_kategori, "kategori", "Semua Kategori"),
+                               (self.cb_status, "status", "Semua Status")):
+            dipilih = cb.currentData()
+            cb.blockSignals(True)
+            cb.clear()
+            cb.addItem(semua, None)
+            for (val,) in self.db.fetch_all(f"SELECT DISTINCT {col} FROM medicines WHERE {col} IS NOT NULL ORDER BY {col}"):
+                cb.addItem(str(val), val)
+            idx = cb.findData(dipilih)
+            cb.setCurrentIndex(idx if idx >= 0 else 0)
+            cb.blockSignals(False)
 
     def load_data(self):
-        data = self.db.fetch_all("SELECT id, nama_obat, kategori, satuan, stok, status FROM medicines")
-        self.ui.tableWidget.setRowCount(0)
-        for r, row in enumerate(data):
-            self.ui.tableWidget.insertRow(r)
-            self.ui.tableWidget.setItem(r, 0, QtWidgets.QTableWidgetItem(str(row[1]))) # Nama
-            self.ui.tableWidget.setItem(r, 1, QtWidgets.QTableWidgetItem(str(row[2]))) # Kategori
-            self.ui.tableWidget.setItem(r, 2, QtWidgets.QTableWidgetItem(str(row[3]))) # Satuan
-            self.ui.tableWidget.setItem(r, 3, QtWidgets.QTableWidgetItem(str(row[4]))) # Stok
-            self.ui.tableWidget.setItem(r, 4, QtWidgets.QTableWidgetItem(str(row[5]))) # Status
-            self.ui.tableWidget.item(r, 0).setData(QtCore.Qt.UserRole, row[0]) # Hidden ID
+        # Halaman berikutnya diambil lewat fetchMore saat view di-scroll
+        self.perlu_muat = False
+        self.model.reload()
 
     def tambah(self):
         nama, ok = QtWidgets.QInputDialog.getText(self, "Tambah", "Nama Obat:")
@@ -265,81 +1748,156 @@ class StokWindow(BaseWindow):
             sat, _ = QtWidgets.QInputDialog.getText(self, "Tambah", "Satuan:")
             stok, _ = QtWidgets.QInputDialog.getInt(self, "Tambah", "Stok Awal:")
             harga, _ = QtWidgets.QInputDialog.getInt(self, "Tambah", "Harga Jual:")
-            self.db.execute_query("INSERT INTO medicines (nama_obat, kategori, satuan, stok, harga_jual) VALUES (?,?,?,?,?)",
-                                  (nama, kat, sat, stok, harga))
-            self.load_data()
+            barcode, _ = QtWidgets.QInputDialog.getText(self, "Tambah", "Barcode (opsional):")
+            # Stok awal dicatat sebagai mutasi supaya saldo cocok dengan buku besar
+            try:
+                with self.db.transaction() as cur:
+                    cur.execute("INSERT INTO medicines (nama_obat, kategori, satuan, stok, harga_jual, barcode) "
+                                "VALUES (?,?,?,0,?,?)", (nama, kat, sat, harga, barcode.strip() or None))
+                    cur.execute(Database.STOCK_ADJUST, (stok, cur.lastrowid, stok))
+            except sqlite3.IntegrityError as e:
+                QtWidgets.QMessageBox.warning(self, "Gagal", f"Barcode sudah dipakai obat lain ({e})")
+            except sqlite3.Error as e:
+                QtWidgets.QMessageBox.critical(self, "Error", f"Simpan obat gagal: {e}")
 
     def edit(self):
-        row = self.ui.tableWidget.currentRow()
+        row = self.table.currentIndex().row()
         if row < 0: return
-        oid = self.ui.tableWidget.item(row, 0).data(QtCore.Qt.UserRole)
-        nama_lama = self.ui.tableWidget.item(row, 0).text()
+        data = self.model.row_data(row)
+        if data is None: return
+        oid, nama_lama, stok_old = data[0], data[1], data[4]
         nama_baru, ok = QtWidgets.QInputDialog.getText(self, "Edit", "Nama Obat:", text=nama_lama)
         if ok:
-            stok_old = self.ui.tableWidget.item(row, 3).text()
-            stok, _ = QtWidgets.QInputDialog.getInt(self, "Edit", "Update Stok:", value=int(stok_old))
-            self.db.execute_query("UPDATE medicines SET nama_obat=?, stok=? WHERE id=?", (nama_baru, stok, oid))
-            self.load_data()
+            stok, _ = QtWidgets.QInputDialog.getInt(self, "Edit", "Update Stok:", value=int(stok_old or 0))
+            try:
+                with self.db.transaction() as cur:
+                    cur.execute("UPDATE medicines SET nama_obat=? WHERE id=?", (nama_baru, oid))
+                    cur.execute(Database.STOCK_ADJUST, (stok, oid, stok))
+            except sqlite3.Error as e:
+                QtWidgets.QMessageBox.critical(self, "Error", f"Simpan obat gagal: {e}")
 
     def hapus(self):
-        row = self.ui.tableWidget.currentRow()
+        row = self.table.currentIndex().row()
         if row < 0: return
-        oid = self.ui.tableWidget.item(row, 0).data(QtCore.Qt.UserRole)
+        oid = self.model.row_id(row)
+        if oid is None: return
         if QtWidgets.QMessageBox.question(self, "Hapus", "Yakin hapus?") == QtWidgets.QMessageBox.Yes:
             self.db.execute_query("DELETE FROM medicines WHERE id=?", (oid,))
-            self.load_data()
 
 # --- PENJUALAN ---
 class PenjualanWindow(BaseWindow):
+    # Scanner keyboard-wedge mengetik tiap karakter < ~30 ms (manusia jauh lebih lambat);
+    # ketikan secepat itu dianggap satu scan dan pencarian type-ahead ditahan sampai selesai.
+    SCAN_MS = 30
+
     def __init__(self):
         super().__init__()
-        self.ui = Ui_Penjualan()
+        self.ui = load_ui("penjualan")()
         self.ui.setupUi(self)
         self.db = Database()
-        self.keranjang = []
-        self.setup_navigation() # AUTO DETECT TOMBOL
 
         try:
             self.ui.pushButton_7.clicked.connect(self.add_cart) # Tambah
             self.ui.pushButton_9.clicked.connect(self.bayar)    # Bayar
         except: pass
 
-        # Layout Keranjang
-        self.w_cart = QtWidgets.QWidget()
-        self.l_cart = QtWidgets.QVBoxLayout(self.w_cart)
-        self.l_cart.setAlignment(QtCore.Qt.AlignTop)
-        self.ui.scrollArea.setWidget(self.w_cart)
-        self.ui.scrollArea.setWidgetResizable(True)
+        # Keranjang: model per obat + QTableView di tempat scroll area hasil designer
+        self.cart = CartModel(self)
+        self.cart.total_changed.connect(lambda tot: self.ui.label_37.setText(f"Rp {tot:,}"))
+        area = self.ui.scrollArea
+        self.cart_view = QtWidgets.QTableView(area.parentWidget())
+        self.cart_view.setGeometry(area.geometry())
+        self.cart_view.setModel(self.cart)
+        self.cart_view.setItemDelegateForColumn(CartModel.QTY, QtyDelegate(self.cart_view))
+        self.cart_view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.cart_view.setEditTriggers(QtWidgets.QAbstractItemView.DoubleClicked |
+                                       QtWidgets.QAbstractItemView.EditKeyPressed)
+        self.cart_view.verticalHeader().hide()
+        self.cart_view.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        hapus = QtWidgets.QShortcut(QtGui.QKeySequence.Delete, self.cart_view, context=QtCore.Qt.WidgetShortcut)
+        hapus.activated.connect(lambda: self.cart.remove(self.cart_view.currentIndex().row()))
+        area.hide()
+        self.cart_view.show()
 
-        self.init_combo()
+        # Pencarian obat type-ahead (FTS5, 20 hasil teratas) menggantikan combo berisi semua obat
+        self.db.refresh_popularity()
+        self.watch_catalog(self.on_catalog_changed)
+        self.obat_dipilih = None
+        self.hasil_cari = MedicineSearchModel(self.catalog, parent=self)
+        self.cari_obat = QtWidgets.QLineEdit(self.ui.comboBox.parentWidget())
+        self.cari_obat.setGeometry(self.ui.comboBox.geometry())
+        self.cari_obat.setPlaceholderText("Cari obat...")
+        self.ui.comboBox.hide()
+        completer = QtWidgets.QCompleter(self.hasil_cari, self)
+        completer.setCompletionMode(QtWidgets.QCompleter.UnfilteredPopupCompletion)
+        completer.popup().setMinimumWidth(320)
+        completer.activated[QtCore.QModelIndex].connect(self.pilih_obat)
+        self.cari_obat.setCompleter(completer)
+        self.ketik_terakhir = 0.0
+        self.timer_cari = QtCore.QTimer(self)
+        self.timer_cari.setSingleShot(True)
+        self.timer_cari.setInterval(self.SCAN_MS * 3)
+        self.timer_cari.timeout.connect(lambda: self.cari(self.cari_obat.text()))
+        self.cari_obat.textEdited.connect(self.on_ketik)
+        self.cari_obat.returnPressed.connect(self.scan_atau_tambah)
         self.load_hist()
 
-    def init_combo(self):
-        self.ui.comboBox.clear()
-        self.map_obat = {}
-        data = self.db.fetch_all("SELECT id, nama_obat, harga_jual FROM medicines WHERE stok > 0")
-        for r in data:
-            lbl = f"{r[1]} - Rp {r[2]:,}"
-            self.ui.comboBox.addItem(lbl)
-            self.map_obat[lbl] = {'id': r[0], 'nama': r[1], 'harga': r[2]}
+    def refresh(self):
+        self.catalog.sync()
+        self.load_hist()
+
+    def on_ketik(self, teks):
+        sekarang = time.perf_counter()
+        burst = (sekarang - self.ketik_terakhir) * 1000 < self.SCAN_MS
+        self.ketik_terakhir = sekarang
+        self.obat_dipilih = None
+        if burst:
+            self.timer_cari.start()     # kemungkinan scan: tunggu Enter dari scanner
+        else:
+            self.cari(teks)
+
+    def scan_atau_tambah(self):
+        # Enter: kalau isinya barcode yang dikenal langsung masuk keranjang, selain itu pakai hasil pencarian
+        self.timer_cari.stop()
+        obat = self.catalog.by_barcode(self.cari_obat.text())
+        if obat is None:
+            self.add_cart()
+            return
+        self.obat_dipilih = obat.id
+        self.add_cart()
+        self.obat_dipilih = None
+        self.cari_obat.completer().popup().hide()
+        self.cari_obat.clear()
+
+    def cari(self, teks):
+        self.obat_dipilih = None
+        self.hasil_cari.search(teks)
+        if self.hasil_cari.ids:
+            self.cari_obat.completer().complete()
+
+    def pilih_obat(self, index):
+        self.obat_dipilih = index.data(QtCore.Qt.UserRole)
+
+    def on_catalog_changed(self, ids):
+        self.hasil_cari.refresh()
 
     def add_cart(self):
-        txt = self.ui.comboBox.currentText()
-        if not txt: return
-        d = self.map_obat.get(txt)
-        qty = 1
-        sub = d['harga'] * qty
-        self.keranjang.append({'id': d['id'], 'nama': d['nama'], 'qty': qty, 'sub': sub})
-        
-        lb = QtWidgets.QLabel(f"{d['nama']} x{qty} = Rp {sub:,}")
-        lb.setStyleSheet("border-bottom:1px solid #ddd;")
-        self.l_cart.addWidget(lb)
-        
-        tot = sum(x['sub'] for x in self.keranjang)
-        self.ui.label_37.setText(f"Rp {tot:,}")
+        # Obat dari pilihan completer, atau hasil teratas kalau kasir langsung menekan Enter.
+        # Enter di popup sampai ke returnPressed sebelum activated, jadi baris yang sedang
+        # disorot panah dibaca langsung dari popup.
+        mid = self.obat_dipilih
+        popup = self.cari_obat.completer().popup()
+        if popup.isVisible() and popup.currentIndex().isValid():
+            mid = popup.currentIndex().data(QtCore.Qt.UserRole)
+        if mid is None and self.hasil_cari.ids:
+            mid = self.hasil_cari.ids[0]
+        d = self.catalog.get(mid)
+        if d is None: return
+        # Obat yang sama menambah qty baris yang ada
+        self.cart_view.selectRow(self.cart.add(d))
 
     def bayar(self):
-        tot = sum(x['sub'] for x in self.keranjang)
+        tot = self.cart.total
         if tot == 0: return
         try:
             val = self.ui.lineEdit.text().replace(".","").replace("Rp","").strip()
@@ -353,29 +1911,31 @@ class PenjualanWindow(BaseWindow):
             return
             
         kemb = bayar - tot
-        self.ui.label_34.setText(f"Kembalian: Rp {kemb:,}")
-        
         tgl = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.db.execute_query("INSERT INTO sales (tanggal, total_harga, uang_bayar, kembalian) VALUES (?,?,?,?)",
-                              (tgl, tot, bayar, kemb))
-        sid = self.db.fetch_one("SELECT MAX(id) FROM sales")[0]
-        
-        for i in self.keranjang:
-            self.db.execute_query("INSERT INTO sale_details (sale_id, medicine_id, jumlah, subtotal) VALUES (?,?,?,?)",
-                                  (sid, i['id'], i['qty'], i['sub']))
-            self.db.execute_query("UPDATE medicines SET stok = stok - ? WHERE id = ?", (i['qty'], i['id']))
+        try:
+            with self.db.transaction() as cur:
+                cur.execute("INSERT INTO sales (tanggal, total_harga, uang_bayar, kembalian) VALUES (?,?,?,?)",
+                            (tgl, tot, bayar, kemb))
+                sid = cur.lastrowid
+                cur.executemany("INSERT INTO sale_details (sale_id, medicine_id, jumlah, subtotal) VALUES (?,?,?,?)",
+                                [(sid, i['id'], i['qty'], i['sub']) for i in self.cart.lines])
+                cur.executemany(Database.STOCK_MOVEMENT, Database.stock_movements(self.cart.lines, 'sale', sid))
+        except Exception as e:
+            QtWidgets.QMessageBox.critical(self, "Error", f"Transaksi gagal: {e}")
+            return
+
+        self.ui.label_34.setText(f"Kembalian: Rp {kemb:,}")
         
         QtWidgets.QMessageBox.information(self, "Sukses", "Transaksi Berhasil")
-        self.keranjang = []
-        for i in reversed(range(self.l_cart.count())): 
-            self.l_cart.itemAt(i).widget().setParent(None)
+        self.cart.clear()
         self.ui.lineEdit.clear()
-        self.ui.label_37.setText("Rp 0")
-        self.init_combo()
         self.load_hist()
 
     def load_hist(self):
-        d = self.db.fetch_all("SELECT id, tanggal, total_harga FROM sales ORDER BY id DESC LIMIT 5")
+        self.show_loading(self.ui.tableWidget)
+        self.run_async("riwayat", lambda: self.db.fetch_all("SELECT id, tanggal, total_harga FROM sales ORDER BY id DESC LIMIT 5"), self.fill_hist)
+
+    def fill_hist(self, d):
         self.ui.tableWidget.setRowCount(0)
         for r_idx, row in enumerate(d):
             self.ui.tableWidget.insertRow(r_idx)
@@ -388,26 +1948,39 @@ class PenjualanWindow(BaseWindow):
 class PembeliWindow(BaseWindow):
     def __init__(self):
         super().__init__()
-        self.ui = Ui_Pembeli()
+        self.ui = load_ui("data_pembeli")()
         self.ui.setupUi(self)
         self.db = Database()
-        self.setup_navigation() # AUTO DETECT TOMBOL
         
         try:
             self.ui.pushButton_7.clicked.connect(self.add)
             self.ui.pushButton_20.clicked.connect(self.delete)
             self.ui.pushButton_9.clicked.connect(self.print_pdf)
         except: pass
+
+        # Tabel member virtual (dimuat per halaman); pencarian nama/telepon memakai index _m008_member_search
+        headers = [self.ui.tableWidget.horizontalHeaderItem(c).text() for c in range(5)]
+        self.model = SqlPageModel(self.db, "members", ["id", "nama_member", "alamat", "telepon", "email"], headers,
+                                  sort_exprs=["id", "nama_member", "alamat", _TELP_NORM, "email"], parent=self)
+        self.table = table_view_from(self.ui.tableWidget, self.model)
+        self.setup_search(self.ui.lineEdit, self.load, "Cari nama / no. telepon member")
+        self.load()
+
+    def refresh(self):
         self.load()
 
     def load(self):
-        d = self.db.fetch_all("SELECT id, nama_member, alamat, telepon, email FROM members")
-        self.ui.tableWidget.setRowCount(0)
-        for r, row in enumerate(d):
-            self.ui.tableWidget.insertRow(r)
-            for c in range(1,5):
-                self.ui.tableWidget.setItem(r, c-1, QtWidgets.QTableWidgetItem(str(row[c])))
-            self.ui.tableWidget.item(r, 0).setData(QtCore.Qt.UserRole, row[0])
+        teks = self.ui.lineEdit.text().strip()
+        digit = normalisasi_telepon(teks)
+        if digit and re.fullmatch(r"[\d\s\-\.\(\)\+]+", teks):
+            # Nomor telepon: range prefix pada index, urut nomor (yang persis sama muncul pertama)
+            self.model.set_search(f"{_TELP_NORM} >= ? AND {_TELP_NORM} < ?", (digit, digit + ":"), sort_column=3)
+        elif fts_query(teks) and self.db.has_table("members_fts"):
+            self.model.set_search("id IN (SELECT rowid FROM members_fts WHERE members_fts MATCH ?)", (fts_query(teks),))
+        elif teks:
+            self.model.set_search("nama_member LIKE ?", (f"%{teks}%",))
+        else:
+            self.model.set_search()
 
     def add(self):
         nm, ok = QtWidgets.QInputDialog.getText(self, "Baru", "Nama:")
@@ -420,15 +1993,17 @@ class PembeliWindow(BaseWindow):
             self.load()
     
     def delete(self):
-        row = self.ui.tableWidget.currentRow()
+        row = self.table.currentIndex().row()
         if row >= 0:
-            mid = self.ui.tableWidget.item(row, 0).data(QtCore.Qt.UserRole)
+            mid = self.model.row_id(row)
+            if mid is None: return
             self.db.execute_query("DELETE FROM members WHERE id=?", (mid,))
             self.load()
 
     def print_pdf(self):
         fn = "Data_Member.pdf"
         try:
+            from reportlab.pdfgen import canvas
             c = canvas.Canvas(fn)
             c.drawString(50, 800, "DATA MEMBER APOTEK")
             c.line(50, 790, 500, 790)
@@ -447,17 +2022,37 @@ class PembeliWindow(BaseWindow):
 class SupplierWindow(BaseWindow):
     def __init__(self):
         super().__init__()
-        self.ui = Ui_Supplier()
+        self.ui = load_ui("supplier")()
         self.ui.setupUi(self)
         self.db = Database()
-        self.setup_navigation() # AUTO DETECT TOMBOL
         
         try: self.ui.pushButton_7.clicked.connect(self.add)
         except: pass
+        self.setup_search(self.ui.lineEdit, self.load, "Cari Supplier")
+        self.load()
+
+    def refresh(self):
         self.load()
 
     def load(self):
-        d = self.db.fetch_all("SELECT nama_supplier, alamat, telepon, email FROM suppliers")
+        # Key yang sama membatalkan pencarian lama yang belum selesai
+        teks = self.ui.lineEdit.text().strip()
+        self.show_loading(self.ui.tableWidget)
+        self.run_async("supplier", lambda: self.query_suppliers(teks), self.fill_table)
+
+    def query_suppliers(self, teks):
+        cols = "s.nama_supplier, s.alamat, s.telepon, s.email"
+        match = fts_query(teks)
+        if not match:
+            return self.db.fetch_all(f"SELECT {cols} FROM suppliers s")
+        if self.db.has_table("suppliers_fts"):
+            return self.db.fetch_all(f"SELECT {cols} FROM suppliers_fts f JOIN suppliers s ON s.id = f.rowid "
+                                     "WHERE suppliers_fts MATCH ? ORDER BY f.rank LIMIT 500", (match,))
+        pola = f"%{teks}%"
+        return self.db.fetch_all(f"SELECT {cols} FROM suppliers s WHERE s.nama_supplier LIKE ? OR s.alamat LIKE ? "
+                                 "OR s.telepon LIKE ? OR s.email LIKE ? LIMIT 500", (pola,) * 4)
+
+    def fill_table(self, d):
         self.ui.tableWidget.setRowCount(0)
         for r, row in enumerate(d):
             self.ui.tableWidget.insertRow(r)
@@ -476,15 +2071,20 @@ class SupplierWindow(BaseWindow):
 class PembelianWindow(BaseWindow):
     def __init__(self):
         super().__init__()
-        self.ui = Ui_Pembelian()
+        self.ui = load_ui("pembelian")()
         self.ui.setupUi(self)
         self.db = Database()
-        self.setup_navigation() # AUTO DETECT TOMBOL
+        self.load()
+
+    def refresh(self):
         self.load()
 
     def load(self):
         q = "SELECT p.id, p.tanggal, s.nama_supplier, p.total_bayar FROM purchases p LEFT JOIN suppliers s ON p.supplier_id = s.id"
-        d = self.db.fetch_all(q)
+        self.show_loading(self.ui.tableWidget)
+        self.run_async("pembelian", lambda: self.db.fetch_all(q), self.fill_table)
+
+    def fill_table(self, d):
         self.ui.tableWidget.setRowCount(0)
         for r, row in enumerate(d):
             self.ui.tableWidget.insertRow(r)
@@ -493,16 +2093,205 @@ class PembelianWindow(BaseWindow):
             self.ui.tableWidget.setItem(r, 2, QtWidgets.QTableWidgetItem(str(row[2]) if row[2] else "-"))
             self.ui.tableWidget.setItem(r, 3, QtWidgets.QTableWidgetItem(f"Rp {row[3]:,}"))
 
+# --- SHELL (SATU JENDELA UTAMA) ---
+class MainShell(QtWidgets.QMainWindow):
+    """
+    Satu jendela utama: sidebar bersama di kiri, halaman di QStackedWidget di kanan.
+    Halaman dibuat saat pertama kali dibuka lalu disimpan, jadi state-nya tetap ada
+    antar kunjungan dan hanya datanya yang dimuat ulang.
+    """
+    def __init__(self):
+        super().__init__()
+        self.setAttribute(QtCore.Qt.WA_DeleteOnClose)
+        self.setWindowTitle("Sistem Manajemen Apotek Riga")
+        self.resize(960, 720)
+        central = QtWidgets.QWidget(self)
+        self.layout_utama = QtWidgets.QHBoxLayout(central)
+        self.layout_utama.setContentsMargins(0, 0, 0, 0)
+        self.layout_utama.setSpacing(0)
+        self.stack = QtWidgets.QStackedWidget(central)
+        self.layout_utama.addWidget(self.stack)
+        self.setCentralWidget(central)
+        self.sidebar = None
+        self.pages = {}
+
+        # Ringkasan query terlambat (hanya saat instrumentasi aktif)
+        if QUERY_STATS.enabled:
+            QtWidgets.QShortcut(QtGui.QKeySequence("Ctrl+Shift+Q"), self, self.show_query_stats)
+
+    def page(self, page_class):
+        page = self.pages.get(page_class)
+        if page is not None:
+            return page
+        page = self.pages[page_class] = page_class()
+        page.setWindowFlags(QtCore.Qt.Widget)
+        page.ui.menubar.hide()
+        page.ui.statusbar.hide()
+        # Sidebar setiap file UI identik: yang pertama dipakai shell, sisanya dibuang
+        sidebar = page.ui.frame
+        page.ui.horizontalLayout.removeWidget(sidebar)
+        if self.sidebar is None:
+            self.sidebar = sidebar
+            self.layout_utama.insertWidget(0, sidebar)
+            self.setup_navigation()
+        else:
+            sidebar.setParent(None)
+            sidebar.deleteLater()
+        self.stack.addWidget(page)
+        return page
+
+    def open_page(self, page_class):
+        existing = page_class in self.pages
+        page = self.page(page_class)
+        if existing and self.stack.currentWidget() is not page:
+            page.refresh()
+        self.stack.setCurrentWidget(page)
+        return page
+
+    def close_page(self, page_class):
+        # Buang halaman dari cache dan bebaskan widget-nya; dibuat ulang saat dibuka lagi
+        page = self.pages.pop(page_class, None)
+        if page is None:
+            return
+        self.stack.removeWidget(page)
+        page.dispose()
+        page.setParent(None)
+        page.deleteLater()
+
+    def setup_navigation(self):
+        # Cari semua tombol (QPushButton) yang ada di sidebar
+        all_buttons = self.sidebar.findChildren(QtWidgets.QPushButton)
+        
+        for btn in all_buttons:
+            # Ambil teks tombol, ubah ke huruf kecil, hilangkan spasi
+            text = btn.text().lower().strip()
+            
+            # --- LOGIKA PENCOCOKAN TEKS ---
+            # Sesuaikan kata kunci ini dengan Tulisan di Tombol Aplikasi Anda.
+            # "pembelian" dicek sebelum "pembeli" karena mengandung kata tersebut.
+            
+            if "dashboard" in text or "home" in text:
+                btn.clicked.connect(self.buka_dashboard)
+                
+            elif "stok" in text or "obat" in text:
+                btn.clicked.connect(self.buka_stok)
+                
+            elif "penjualan" in text or "kasir" in text:
+                btn.clicked.connect(self.buka_penjualan)
+                
+            elif "pembelian" in text or "restock" in text or "kulakan" in text:
+                btn.clicked.connect(self.buka_pembelian)
+                
+            elif "pembeli" in text or "member" in text or "pelanggan" in text:
+                btn.clicked.connect(self.buka_pembeli)
+                
+            elif "supplier" in text or "pemasok" in text:
+                btn.clicked.connect(self.buka_supplier)
+                
+            elif "keluar" in text or "exit" in text or "logout" in text:
+                btn.clicked.connect(self.close_app)
+
+    # --- FUNGSI PINDAH HALAMAN ---
+    def buka_dashboard(self): self.open_page(DashboardWindow)
+    def buka_stok(self): self.open_page(StokWindow)
+    def buka_penjualan(self): self.open_page(PenjualanWindow)
+    def buka_pembeli(self): self.open_page(PembeliWindow)
+    def buka_supplier(self): self.open_page(SupplierWindow)
+    def buka_pembelian(self): self.open_page(PembelianWindow)
+    def close_app(self): self.close()
+
+    def show_query_stats(self):
+        QtWidgets.QMessageBox.information(self, "Statistik Query (Top 10)", QUERY_STATS.summary(10))
+
+    def closeEvent(self, event):
+        for page_class in list(self.pages):
+            self.close_page(page_class)
+        super().closeEvent(event)
+
+# --- STARTUP PROFILER ---
+class StartupProfiler:
+    """
+    --profile-startup: jalankan ulang aplikasi dengan -X importtime, ukur waktu sampai
+    dashboard pertama kali digambar, lalu tampilkan modul import paling mahal.
+    """
+    MARKER = "STARTUP first_paint_ms="
+
+    @classmethod
+    def run(cls, top=15):
+        import subprocess
+        cmd = [sys.executable, "-X", "importtime", os.path.abspath(__file__)] + sys.argv[1:]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        imports = []
+        first_paint = None
+        for line in proc.stderr.splitlines():
+            if line.startswith("import time:") and "|" in line:
+                parts = line[len("import time:"):].split("|")
+                try:
+                    self_us, cum_us = int(parts[0]), int(parts[1])
+                except ValueError:
+                    continue  # baris header
+                name = parts[2].rstrip()
+                # Hanya import tingkat atas (tanpa indentasi) supaya tidak dihitung dobel
+                if not name[1:].startswith(" "):
+                    imports.append((cum_us, self_us, name.strip()))
+        for line in proc.stdout.splitlines():
+            if line.startswith(cls.MARKER):
+                first_paint = float(line[len(cls.MARKER):])
+        imports.sort(reverse=True)
+        print(f"{'kumulatif':>12} {'self':>10}  modul")
+        for cum_us, self_us, name in imports[:top]:
+            print(f"{cum_us / 1000:10.1f}ms {self_us / 1000:8.1f}ms  {name}")
+        print(f"Total import tingkat atas: {sum(i[0] for i in imports) / 1000:.1f} ms")
+        if first_paint is None:
+            print("Time-to-first-paint tidak terukur (aplikasi gagal start?)")
+            print(proc.stderr[-2000:])
+            return 1
+        print(f"Time-to-first-paint: {first_paint:.1f} ms")
+        return 0
+
+    @classmethod
+    def watch(cls, widget):
+        # Di proses anak: catat paint pertama lalu keluar
+        class _FirstPaint(QtCore.QObject):
+            def eventFilter(self, obj, event):
+                if event.type() == QtCore.QEvent.Paint:
+                    obj.removeEventFilter(self)
+                    print(f"{cls.MARKER}{(time.perf_counter() - STARTUP_T0) * 1000:.1f}", flush=True)
+                    QtCore.QTimer.singleShot(0, QtWidgets.QApplication.quit)
+                return False
+        widget._first_paint_filter = _FirstPaint(widget)
+        widget.installEventFilter(widget._first_paint_filter)
+
 # --- MAIN ---
 if __name__ == "__main__":
+    if "--profile-startup" in sys.argv and "importtime" not in sys._xoptions:
+        sys.exit(StartupProfiler.run())
+
     app = QtWidgets.QApplication(sys.argv)
     app.setStyle("Fusion")
+    app.aboutToQuit.connect(ConnectionPool.close_all)
     
     db_test = Database()
+    if "--profile-sql" in sys.argv:
+        QUERY_STATS.enable()
+    if "--rebuild-summary" in sys.argv:
+        db_test.rebuild_daily_summary()
+        print("Ringkasan penjualan harian selesai dibangun ulang.")
+        sys.exit(0)
+    if "--reconcile-stock" in sys.argv:
+        # Cocokkan medicines.stok dengan saldo buku besar stock_movements
+        selisih = db_test.reconcile_stock()
+        for mid, stok, saldo in selisih:
+            print(f"Obat #{mid}: stok {stok} -> {saldo} (saldo buku besar)")
+        print(f"Rekonsiliasi stok selesai, {len(selisih)} obat diperbaiki.")
+        sys.exit(0)
     if not db_test.connect():
         print("GAGAL KONEKSI DATABASE! Pastikan file db_apotek.db ada.")
     else:
         # Mulai dari Dashboard
-        win = DashboardWindow()
+        win = MainShell()
+        win.buka_dashboard()
+        if "--profile-startup" in sys.argv:
+            StartupProfiler.watch(win)
         win.show()
         sys.exit(app.exec_())
\ No newline at end of file
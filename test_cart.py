@@ -0,0 +1,51 @@
+from PyQt5 import QtCore
+
+import main
+
+
+def test_cart_merges_lines_and_keeps_running_total(qapp):
+    cart = main.CartModel()
+    totals = []
+    cart.total_changed.connect(totals.append)
+    a = main.CatalogItem(1, "Paracetamol", 1500, 10)
+    b = main.CatalogItem(2, "Amoxicillin", 2000, 10)
+    c = main.CatalogItem(3, "Vitamin C", 700, 10)
+
+    def cek():
+        # Total berjalan harus sama dengan jumlah ulang subtotal
+        assert cart.total == sum(l['qty'] * l['harga'] for l in cart.lines)
+        assert all(l['sub'] == l['qty'] * l['harga'] for l in cart.lines)
+        assert totals[-1] == cart.total
+
+    assert cart.add(a) == 0
+    assert cart.add(b, 2) == 1
+    assert cart.add(a) == 0                 # obat sama: qty baris yang ada bertambah
+    assert [(l['id'], l['qty']) for l in cart.lines] == [(1, 2), (2, 2)]
+    assert cart.total == 7000
+    cek()
+
+    assert cart.setData(cart.index(1, main.CartModel.QTY), 5)
+    assert cart.data(cart.index(1, 3)) == "Rp 10,000"
+    assert cart.total == 13000
+    cek()
+    assert not cart.setData(cart.index(1, 0), 9)                # hanya kolom Qty yang bisa diedit
+    assert cart.flags(cart.index(1, main.CartModel.QTY)) & QtCore.Qt.ItemIsEditable
+
+    cart.add(c)
+    cart.remove(0)
+    assert [l['id'] for l in cart.lines] == [2, 3]
+    assert cart.add(c) == 1                 # nomor baris setelah hapus tetap benar
+    assert cart.add(b) == 0
+    assert cart.total == 6 * 2000 + 2 * 700
+    cek()
+
+    cart.setData(cart.index(0, main.CartModel.QTY), 0)          # qty 0 = hapus baris
+    assert [l['id'] for l in cart.lines] == [3]
+    cart.remove(5)                          # baris di luar jangkauan diabaikan
+    assert cart.total == 1400
+    cek()
+
+    cart.clear()
+    assert cart.rowCount() == 0 and cart.total == 0 and totals[-1] == 0
+    assert cart.add(a) == 0
+    cek()
@@ -0,0 +1,51 @@
+import pytest
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+import main
+
+
+def tooltip_over_first_bar(chart):
+    chart.resize(400, 200)
+    chart.show()
+    chart.set_data(["Sen", "Sel"], [12, 3400], animate=False)
+    plot = chart._plot_rect()
+    pos = QtCore.QPoint(int(plot.left() + 5), int(plot.center().y()))
+    QtWidgets.QToolTip.hideText()
+    QtWidgets.QApplication.sendEvent(chart, QtGui.QMouseEvent(
+        QtCore.QEvent.MouseMove, pos, chart.mapToGlobal(pos), QtCore.Qt.NoButton, QtCore.Qt.NoButton, QtCore.Qt.NoModifier))
+    return QtWidgets.QToolTip.text()
+
+
+def test_tooltip_unit_comes_from_formatter(qapp):
+    jumlah = main.BarChartWidget("Transaksi")
+    assert tooltip_over_first_bar(jumlah) == "Sen\n12"
+    omzet = main.BarChartWidget("Omzet", formatter=main.format_rupiah)
+    assert tooltip_over_first_bar(omzet) == "Sen\nRp 12"
+    # Label sumbu Y yang membawa "Rp" mendapat kolom lebih lebar, area grafik tetap di kanannya
+    assert omzet._plot_rect().left() >= jumlah._plot_rect().left()
+    for chart in (jumlah, omzet):
+        chart.close()
+        chart.deleteLater()
+
+
+@pytest.mark.parametrize("kind", ["bar", "line"])
+def test_matplotlib_refresh_reuses_artist(qapp, kind):
+    pytest.importorskip("matplotlib")
+    chart = main.MatplotlibChart("Uji", kind)
+    chart.set_data(["a", "b", "c"], [1, 2, 3])
+    artist = chart.artist
+    chart.set_data(["b", "c", "d"], [5, 0, 7])
+    assert chart.artist is artist
+    if kind == "bar":
+        assert [bar.get_height() for bar in artist] == [5, 0, 7]
+    else:
+        assert list(artist.get_ydata()) == [5, 0, 7]
+    assert [t.get_text() for t in chart.ax.get_xticklabels()] == ["b", "c", "d"]
+
+    chart.set_data(["a", "b"], [1, 2])     # jumlah bar berubah: dibangun ulang
+    assert chart.artist is not artist
+    if kind == "bar":
+        assert len(chart.ax.patches) == 2
+    else:
+        assert len(chart.ax.lines) == 1 and list(chart.artist.get_ydata()) == [1, 2]
+    chart.deleteLater()
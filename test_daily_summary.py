@@ -0,0 +1,45 @@
+import main
+
+
+def summary(db, hari):
+    return db.fetch_one("SELECT jumlah_transaksi, total, item_terjual FROM daily_sales_summary WHERE hari = ?",
+                        (hari,))
+
+
+def snapshot(db):
+    return db.fetch_all("SELECT * FROM daily_sales_summary ORDER BY hari")
+
+
+def test_summary_triggers_follow_sales_and_details(db_copy):
+    db = main.Database()
+    mid = db.fetch_one("SELECT MIN(id) FROM medicines")[0]
+    with db.transaction() as cur:
+        cur.execute("INSERT INTO sales (tanggal, total_harga, uang_bayar, kembalian) "
+                    "VALUES ('05/01/2030 10:00:00', 5000, 5000, 0)")
+        sid = cur.lastrowid
+        cur.executemany("INSERT INTO sale_details (sale_id, medicine_id, jumlah, subtotal) VALUES (?,?,?,?)",
+                        [(sid, mid, 2, 2000), (sid, mid, 3, 3000)])
+        cur.execute("INSERT INTO sales (tanggal, total_harga, uang_bayar, kembalian) "
+                    "VALUES ('2030-01-05 11:00:00', 1000, 1000, 0)")
+        sid2 = cur.lastrowid
+    # Format lama dd/mm/yyyy dinormalisasi trigger, lalu ikut masuk ringkasan hari yang sama
+    assert summary(db, 20300105) == (2, 6000, 5)
+
+    db.execute_query("UPDATE sales SET total_harga = 7000 WHERE id = ?", (sid,))
+    assert summary(db, 20300105) == (2, 8000, 5)
+
+    db.execute_query("DELETE FROM sale_details WHERE sale_id = ? AND jumlah = 3", (sid,))
+    assert summary(db, 20300105) == (2, 8000, 2)
+
+    # Pindah hari: dikurangi dari hari lama, ditambah ke hari baru (beserta item-nya)
+    db.execute_query("UPDATE sales SET tanggal = '2030-01-06 09:00:00' WHERE id = ?", (sid,))
+    assert summary(db, 20300105) == (1, 1000, 0)
+    assert summary(db, 20300106) == (1, 7000, 2)
+
+    db.execute_query("DELETE FROM sales WHERE id = ?", (sid2,))
+    assert summary(db, 20300105) is None
+
+    # Hasil trigger sama persis dengan membangun ulang dari tabel mentah
+    dari_trigger = snapshot(db)
+    db.rebuild_daily_summary()
+    assert snapshot(db) == dari_trigger
@@ -0,0 +1,18 @@
+import main
+from conftest import settle
+
+
+def test_statistics_come_from_worker_query_without_loading_catalog(db_copy):
+    db = main.Database()
+    db.execute_query("UPDATE medicines SET stok = 1 WHERE id = (SELECT MIN(id) FROM medicines)")
+    jumlah = db.fetch_one("SELECT COUNT(*) FROM medicines")[0]
+    terendah = db.fetch_one("SELECT nama_obat FROM medicines ORDER BY stok, id LIMIT 1")[0]
+
+    page = main.DashboardWindow()
+    settle()
+    assert page.ui.label_16.text() == str(jumlah)
+    assert page.ui.label_10.text() == terendah
+    assert page.ui.label_13.text() == "1/50"
+    # Katalog obat (muat penuh) tidak pernah disentuh dari slot dashboard
+    assert db.pool.catalog is None
+    page.close()
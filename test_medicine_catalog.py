@@ -0,0 +1,97 @@
+import sqlite3
+
+import main
+
+
+def catalog_with_log():
+    db = main.Database()
+    catalog = main.MedicineCatalog.for_db(db)
+    catalog.all()
+    seen = []
+    catalog.changed.connect(seen.append)
+    return db, catalog, seen
+
+
+def test_foreign_commit_to_other_table_does_not_reload(db_copy):
+    db, catalog, seen = catalog_with_log()
+    items = catalog.items
+    other = sqlite3.connect("db_apotek.db")
+    other.execute("UPDATE suppliers SET telepon = telepon")
+    other.commit()
+    catalog.poll()
+    assert seen == []
+    assert catalog.items is items
+
+
+def test_foreign_sale_patches_only_touched_ids(db_copy):
+    db, catalog, seen = catalog_with_log()
+    items = catalog.items
+    mid = next(iter(items))
+    stok = items[mid].stok
+    other = sqlite3.connect("db_apotek.db")
+    other.execute("INSERT INTO stock_movements (medicine_id, jenis, jumlah) VALUES (?, 'sale', -1)", (mid,))
+    other.commit()
+    catalog.poll()
+    assert seen == [{mid}]
+    assert catalog.items is items
+    assert catalog.get(mid).stok == stok - 1
+
+
+def test_own_write_is_applied_immediately(db_copy):
+    db, catalog, seen = catalog_with_log()
+    mid = next(iter(catalog.items))
+    db.execute_query("UPDATE medicines SET harga_jual = 4321 WHERE id = ?", (mid,))
+    assert seen == [{mid}]
+    assert catalog.get(mid).harga == 4321
+
+
+def test_pruned_log_falls_back_to_full_reload(db_copy):
+    db, catalog, seen = catalog_with_log()
+    mid = next(iter(catalog.items))
+    other = sqlite3.connect("db_apotek.db")
+    for harga in (1, 2, 3):
+        other.execute("UPDATE medicines SET harga_jual = ? WHERE id = ?", (harga, mid))
+    other.execute("DELETE FROM medicine_changes WHERE seq < (SELECT MAX(seq) FROM medicine_changes)")
+    other.commit()
+    catalog.poll()
+    assert seen == [None]
+    assert catalog.get(mid).harga == 3
+
+
+def test_failed_prune_keeps_changes_and_closes_transaction(db_copy, monkeypatch):
+    db, catalog, seen = catalog_with_log()
+    monkeypatch.setattr(main.MedicineCatalog, "KEEP", 1)
+    conn = db.connect()
+    conn.execute("CREATE TEMP TRIGGER gagal_pangkas BEFORE DELETE ON medicine_changes "
+                 "BEGIN SELECT RAISE(ABORT, 'database is locked'); END")
+    mid = next(iter(catalog.items))
+    other = sqlite3.connect("db_apotek.db")
+    for harga in (1, 2, 3):
+        other.execute("UPDATE medicines SET harga_jual = ? WHERE id = ?", (harga, mid))
+    other.commit()
+    catalog.poll()
+    assert seen == [{mid}]
+    assert catalog.get(mid).harga == 3
+    assert not conn.in_transaction
+    with db.transaction() as cur:
+        cur.execute("UPDATE medicines SET harga_jual = 4 WHERE id = ?", (mid,))
+    assert catalog.get(mid).harga == 4
+
+
+def test_failed_apply_is_retried_on_next_poll(db_copy, monkeypatch):
+    db, catalog, seen = catalog_with_log()
+    mid = next(iter(catalog.items))
+    other = sqlite3.connect("db_apotek.db")
+    other.execute("UPDATE medicines SET harga_jual = 777 WHERE id = ?", (mid,))
+    other.commit()
+
+    def gagal(conn, ids):
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(catalog, "_apply", gagal)
+    catalog.poll()
+    monkeypatch.undo()
+    assert seen == []
+
+    catalog.poll()      # data_version tidak berubah lagi, tapi perubahan yang gagal tetap dibaca ulang
+    assert seen == [{mid}]
+    assert catalog.get(mid).harga == 777
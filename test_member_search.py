@@ -0,0 +1,29 @@
+import main
+from conftest import settle
+
+
+def test_phone_prefix_62_only_rewritten_with_following_digits():
+    assert main.normalisasi_telepon("6") == "6"
+    assert main.normalisasi_telepon("62") == "62"
+    assert main.normalisasi_telepon("+62 8") == "08"
+    assert main.normalisasi_telepon("+62 812-3456") == "08123456"
+    assert main.normalisasi_telepon("0812 3456") == "08123456"
+
+
+def test_typing_62_does_not_match_every_local_number(db_copy):
+    db = main.Database()
+    db.execute_many("INSERT INTO members (nama_member, telepon) VALUES (?, ?)",
+                    [("Lokal", "0812000001"), ("Lokal 2", "0813000002"), ("Intl", "+62 812-000-003")])
+    page = main.PembeliWindow()
+    settle()
+
+    def hasil(teks):
+        page.ui.lineEdit.setText(teks)
+        page.load()
+        return [page.model.data(page.model.index(r, 3)) for r in range(page.model.rowCount())]
+
+    assert "0812000001" not in hasil("62")
+    assert all(t.startswith("6") for t in hasil("62"))
+    assert "+62 812-000-003" in hasil("628")
+    assert "0812000001" in hasil("628")
+    page.close()
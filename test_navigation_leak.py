@@ -0,0 +1,55 @@
+import gc
+import resource
+
+from PyQt5 import QtCore, QtWidgets
+
+import main
+from conftest import settle
+
+PAGES = (main.StokWindow, main.PenjualanWindow, main.PembeliWindow,
+         main.SupplierWindow, main.PembelianWindow, main.DashboardWindow)
+
+
+def rss_kb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+
+
+def live_objects(shell):
+    gc.collect()
+    return (len(QtWidgets.QApplication.allWidgets()), len(shell.findChildren(QtCore.QObject)))
+
+
+def navigate(shell, laps):
+    # Satu putaran membuka semua halaman lalu membuang (evict) semuanya kecuali dashboard,
+    # sehingga setiap putaran membangun dan menghancurkan halaman dari awal.
+    for _ in range(laps):
+        for page_class in PAGES:
+            shell.open_page(page_class)
+            settle()
+        for page_class in list(shell.pages):
+            if page_class is not main.DashboardWindow:
+                shell.close_page(page_class)
+        settle()
+
+
+def test_navigation_frees_closed_pages(db_copy):
+    shell = main.MainShell()
+    shell.buka_dashboard()
+    shell.show()
+    settle()
+
+    navigate(shell, 20)             # pemanasan: cache, katalog, font, dsb.
+    widgets_awal, objects_awal = live_objects(shell)
+    rss_awal = rss_kb()
+
+    navigate(shell, 400)            # 2400 navigasi, 2000 halaman dibuat dan dibuang
+
+    widgets_akhir, objects_akhir = live_objects(shell)
+    assert list(shell.pages) == [main.DashboardWindow]
+    assert widgets_akhir <= widgets_awal
+    assert objects_akhir <= objects_awal
+    assert rss_kb() - rss_awal < 40 * 1024, "RSS terus naik setelah halaman ditutup"
+
+    shell.close()
+    settle()
@@ -0,0 +1,29 @@
+from PyQt5 import QtCore
+from PyQt5.QtTest import QTest
+
+import main
+from conftest import settle
+
+
+def test_enter_adds_the_highlighted_completer_row(db_copy):
+    main.Database().execute_many(
+        "INSERT INTO medicines (nama_obat, kategori, satuan, stok, harga_jual) VALUES (?,?,?,?,?)",
+        [("Vitamin Uji A", "Vitamin", "Tablet", 10, 1000), ("Vitamin Uji C", "Vitamin", "Tablet", 10, 2000)])
+    page = main.PenjualanWindow()
+    page.show()
+    settle()
+
+    QTest.keyClicks(page.cari_obat, "vitamin uji")
+    QTest.qWait(page.SCAN_MS * 5)   # ketikan cepat ditahan timer sampai dianggap bukan scan
+    popup = page.cari_obat.completer().popup()
+    assert popup.isVisible() and len(page.hasil_cari.ids) > 1
+
+    QTest.keyClick(popup, QtCore.Qt.Key_Down)
+    QTest.keyClick(popup, QtCore.Qt.Key_Down)
+    disorot = popup.currentIndex().data(QtCore.Qt.UserRole)
+    assert disorot == page.hasil_cari.ids[1]
+
+    QTest.keyClick(popup, QtCore.Qt.Key_Return)
+    settle()
+    assert [i['id'] for i in page.cart.lines] == [disorot]
+    page.close()
@@ -0,0 +1,20 @@
+import main
+from conftest import settle
+
+
+def test_resubmitting_a_key_while_tasks_finish(db_copy):
+    # Task cepat yang selesai tepat saat dibatalkan dulu membuat tryTake
+    # mengenai QRunnable yang sudah dihapus (RuntimeError di slot)
+    executor = main.QueryExecutor(main.Database())
+    hasil = []
+    for i in range(3000):
+        executor.submit("stok", lambda i=i: i, hasil.append)
+        if i % 100 == 0:
+            settle()
+    executor.cancel_all()
+    executor.submit("stok", lambda: "terakhir", hasil.append)
+    settle()
+
+    assert hasil[-1] == "terakhir"
+    assert not executor.tasks
+    assert not main.QueryExecutor.running
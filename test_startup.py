@@ -0,0 +1,25 @@
+import os
+import subprocess
+import sys
+
+import main
+from conftest import REPO
+
+
+def test_startup_does_not_import_optional_modules():
+    kode = "import sys, main; print(sorted(m for m in ('logging', 'matplotlib', 'reportlab') if m in sys.modules))"
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    out = subprocess.run([sys.executable, "-c", kode], cwd=REPO, env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+def test_enabled_query_stats_write_slow_query_log(db_copy):
+    stats = main.QueryStats(log_file=str(db_copy / "slow_query.log"))
+    stats.enable(slow_ms=0)
+    conn = main.Database().connect()
+    stats.record(conn, "SELECT COUNT(*) FROM medicines", (), 0.002, 1, "uji")
+    for handler in list(stats._log.handlers):
+        stats._log.removeHandler(handler)
+        handler.close()
+    with open(db_copy / "slow_query.log", encoding="utf-8") as f:
+        assert "SELECT COUNT(*) FROM medicines" in f.read()
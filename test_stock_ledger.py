@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+
+import main
+from conftest import REPO
+
+
+def medicine_with_history(db):
+    # Obat baru tanpa saldo awal: pembelian 10, penjualan 3, lalu stok opname ke 5
+    with db.transaction() as cur:
+        cur.execute("INSERT INTO medicines (nama_obat, stok, harga_jual) VALUES ('Uji Ledger', 0, 1000)")
+        mid = cur.lastrowid
+    db.execute_many("INSERT INTO stock_movements (medicine_id, jenis, jumlah, ref_id, waktu) VALUES (?,?,?,?,?)",
+                    [(mid, 'purchase', 10, None, '2026-01-01 08:00:00'),
+                     (mid, 'sale', -3, None, '2026-01-02 08:00:00')])
+    db.execute_query(main.Database.STOCK_ADJUST, (5, mid, 5))
+    return mid
+
+
+def test_ledger_balance_and_reconcile(db_copy):
+    db = main.Database()
+    mid = medicine_with_history(db)
+
+    assert db.stock_at(mid, '2025-12-31 23:59:59') == 0
+    assert db.stock_at(mid, '2026-01-01 08:00:00') == 10
+    assert db.stock_at(mid, '2026-01-02 12:00:00') == 7
+    assert db.stock_at(mid, '9999-12-31 23:59:59') == 5
+    assert db.fetch_one("SELECT stok FROM medicines WHERE id = ?", (mid,))[0] == 5
+    assert db.reconcile_stock() == []
+
+    # Saldo cache yang melenceng dikembalikan ke saldo buku besar
+    db.execute_query("UPDATE medicines SET stok = 99 WHERE id = ?", (mid,))
+    assert db.reconcile_stock() == [(mid, 99, 5)]
+    assert db.fetch_one("SELECT stok FROM medicines WHERE id = ?", (mid,))[0] == 5
+    assert db.reconcile_stock() == []
+
+
+def test_reconcile_stock_flag_reports_mismatches(db_copy):
+    db = main.Database()
+    mid = medicine_with_history(db)
+    db.execute_query("UPDATE medicines SET stok = 99 WHERE id = ?", (mid,))
+    main.ConnectionPool.close_all()
+
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    out = subprocess.run([sys.executable, os.path.join(REPO, "main.py"), "--reconcile-stock"],
+                         cwd=db_copy, env=env, capture_output=True, text=True, timeout=60)
+    assert out.returncode == 0, out.stderr
+    assert f"Obat #{mid}: stok 99 -> 5" in out.stdout
+    assert "1 obat diperbaiki" in out.stdout
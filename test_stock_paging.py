@@ -0,0 +1,61 @@
+import pytest
+
+import main
+
+
+def all_ids(model, reverse=False):
+    while model.canFetchMore():
+        model.fetchMore()
+    rows = range(model.rowCount())
+    if reverse:
+        # Dibaca dari bawah: halaman awal sudah dibuang dan harus diambil ulang dari kuncinya
+        return [model.row_id(r) for r in reversed(rows)][::-1]
+    return [model.row_id(r) for r in rows]
+
+
+@pytest.fixture
+def stock_model(db_copy):
+    db = main.Database()
+    # Banyak nilai kembar (dan NULL) supaya batas halaman jatuh di tengah kunci sort yang sama
+    db.execute_many("INSERT INTO medicines (nama_obat, kategori, satuan, stok, status) VALUES (?,?,?,?,?)",
+                    [(f"Uji {i % 37:02d}", ("Uji A", "Uji B", None)[i % 3], "Strip" if i % 2 else None,
+                      None if i % 11 == 0 else i % 5, ("Aman", "Menipis")[i % 2]) for i in range(500)])
+    model = main.SqlPageModel(db, "medicines", ["nama_obat", "kategori", "satuan", "stok", "status"],
+                              ["Nama", "Kategori", "Satuan", "Stok", "Status"],
+                              sort_exprs=main.StokWindow.SORT_STOK, page_size=7, max_pages=2)
+    return db, model
+
+
+@pytest.mark.parametrize("column", [None, 0, 1, 2, 3, 4])
+@pytest.mark.parametrize("desc", [False, True])
+def test_keyset_pages_match_full_ordered_scan(stock_model, column, desc):
+    db, model = stock_model
+    model.sort_column, model.sort_desc = column, desc
+    model.reload()
+
+    arah = "DESC" if desc else "ASC"
+    order = f"id {arah}" if column is None else f"{main.StokWindow.SORT_STOK[column]} {arah}, id {arah}"
+    expected = [r[0] for r in db.fetch_all(f"SELECT id FROM medicines ORDER BY {order}")]
+    assert all_ids(model) == expected
+    # Hanya max_pages halaman ditahan; halaman yang dibuang diambil ulang dari kunci awalnya
+    assert len(model._pages) <= 2
+    assert all_ids(model, reverse=True) == expected
+
+
+def test_filter_and_search_combine_with_sort(stock_model):
+    db, model = stock_model
+    model.set_filter("kategori", "Uji A")
+    model.sort(3, main.QtCore.Qt.DescendingOrder)
+    expected = [r[0] for r in db.fetch_all("SELECT id FROM medicines WHERE kategori = 'Uji A' "
+                                           "ORDER BY COALESCE(stok, 0) DESC, id DESC")]
+    assert all_ids(model) == expected
+
+    model.set_search("nama_obat LIKE ?", ("Uji 0%",), sort_column=0)
+    expected = [r[0] for r in db.fetch_all("SELECT id FROM medicines WHERE kategori = 'Uji A' AND nama_obat LIKE 'Uji 0%' "
+                                           "ORDER BY nama_obat, id")]
+    assert expected and all_ids(model) == expected
+
+    model.set_filter("kategori", None)
+    model.set_search(None)
+    assert model.rowCount() <= model.page_size
+    assert len(all_ids(model)) == db.fetch_one("SELECT COUNT(*) FROM medicines")[0]
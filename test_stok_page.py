@@ -0,0 +1,16 @@
+from PyQt5 import QtWidgets
+
+import main
+from conftest import settle
+
+
+def test_designer_buttons_stay_clickable_over_table(db_copy):
+    # Edit & Hapus di Stok menumpuk di atas area tabel designer; view pengganti tidak boleh menutupinya
+    page = main.StokWindow()
+    page.show()
+    settle()
+
+    for tombol in (page.ui.pushButton_9, page.ui.pushButton_10):
+        assert tombol.geometry().intersects(page.table.geometry())
+        assert tombol.parentWidget().childAt(tombol.geometry().center()) is tombol
+    page.close()
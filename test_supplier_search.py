@@ -0,0 +1,28 @@
+import main
+from conftest import settle
+
+
+def test_supplier_fts_follows_insert_update_delete(db_copy):
+    db = main.Database()
+    page = main.SupplierWindow()
+    settle()
+
+    def nama(teks):
+        return [r[0] for r in page.query_suppliers(teks)]
+
+    db.execute_query("INSERT INTO suppliers (nama_supplier, alamat, telepon, email) VALUES (?,?,?,?)",
+                     ("PT Zentra Séhat", "Jl. Kenanga 7", "0812 7788", "order@zentra.id"))
+    sid = db.fetch_one("SELECT id FROM suppliers WHERE nama_supplier = 'PT Zentra Séhat'")[0]
+    assert nama("zentra seh") == ["PT Zentra Séhat"]       # prefix, tanpa diakritik
+    assert nama("kenanga zentra") == ["PT Zentra Séhat"]   # semua kata harus cocok, lintas kolom
+
+    db.execute_query("UPDATE suppliers SET nama_supplier = 'CV Qubis Farma', alamat = 'Jl. Melati 3', "
+                     "email = 'order@qubis.id' WHERE id = ?", (sid,))
+    assert nama("zentra") == []
+    assert nama("qubis melati") == ["CV Qubis Farma"]
+
+    db.execute_query("DELETE FROM suppliers WHERE id = ?", (sid,))
+    assert nama("qubis") == []
+    # Index external-content masih sama persis dengan tabel suppliers (error kalau tidak)
+    db.connect().execute("INSERT INTO suppliers_fts(suppliers_fts, rank) VALUES ('integrity-check', 1)")
+    page.close()